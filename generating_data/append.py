@@ -0,0 +1,179 @@
+import argparse
+import glob
+import os
+import re
+import numpy as np
+import create_records as cr
+from context import GeneratorContext
+from create_records import create_customers, create_purchases_batched, create_tickets_batched
+from export import WRITERS, iter_chunks, read_columns, write_chunks
+from seating import SeatAllocator
+from tables import Customer, Purchase, Ticket
+
+
+
+###############################
+# APPEND MODE
+#
+# Grows an existing dataset instead of regenerating it: the high-water-mark ids and the columns
+# new rows reference (customer ids, seats still free per event) are read back from the output directory or
+# from the db, then only the new customers / purchases / tickets are generated with their ids
+# continuing after the existing ones. Output goes to <table>.delta-NNNN files next to the
+# dataset, or straight into postgres with the COPY loader.
+
+# table -> columns read back from an existing dataset
+STATE_COLUMNS = {
+    'customers': ('customer_id',),
+    'events': ('event_id',),
+    'subevents': ('event_id', 'venue_id'),
+    'venues': ('venue_id', 'venue_capacity'),
+    'stages': ('stage_id', 'venue_id'),
+    'seats': ('seat_id', 'stage_id'),
+    'purchases': ('purchase_id', 'purchase_total_price'),
+    'tickets': ('ticket_id', 'event_id', 'ticket_seat_id'),
+}
+
+# tables that get new rows, with the record class owning their id sequence
+APPEND_TABLES = {'customers': Customer, 'purchases': Purchase, 'tickets': Ticket}
+
+
+def delta_name(table, delta):
+    return f"{table}.delta-{delta:04d}"
+
+
+def table_files(dir_name, table, fmt='csv'):
+    # the table, its parallel.py parts (merge=False) and the deltas of earlier appends
+    ext = WRITERS[fmt][1]
+    paths = [f'{dir_name}/{table}.{ext}'] if os.path.exists(f'{dir_name}/{table}.{ext}') else []
+    paths += sorted(glob.glob(f'{dir_name}/{table}.part-*.{ext}'))
+    paths += sorted(glob.glob(f'{dir_name}/{table}.delta-*.{ext}'))
+    if not paths:
+        raise FileNotFoundError(f"No {table}.{ext} in {dir_name}")
+    return paths
+
+
+def next_delta(dir_name):
+    numbers = [int(m.group(1)) for path in os.listdir(dir_name) if (m := re.search(r"\.delta-(\d+)\.", path))]
+    return max(numbers, default=0) + 1
+
+
+def read_file_state(dir_name, fmt='csv'):
+    # {table: {column: array}} for every table in STATE_COLUMNS
+    state = {}
+    for table, columns in STATE_COLUMNS.items():
+        parts = [read_columns(path, columns, fmt) for path in table_files(dir_name, table, fmt)]
+        state[table] = {column: np.concatenate([part[column] for part in parts]) for column in columns}
+    return state
+
+
+def read_db_state(cursor, db_tables):
+    # same shape as read_file_state, db_tables: csv name -> table in the db (loader.DB_TABLES)
+    state = {}
+    for table, columns in STATE_COLUMNS.items():
+        cursor.execute(f"SELECT {', '.join(columns)} FROM {db_tables[table]};")
+        rows = cursor.fetchall()
+        # prices come back as Decimal from NUMERIC columns
+        state[table] = {column: np.array([row[i] for row in rows], dtype=float if column.endswith('price') else np.int64)
+                        for i, column in enumerate(columns)}
+    return state
+
+
+def next_ids(state):
+    # high-water mark + 1 of every appended table, 0 for an empty one
+    starts = {}
+    for table in APPEND_TABLES:
+        ids = state[table][STATE_COLUMNS[table][0]]
+        starts[table] = int(ids.max()) + 1 if len(ids) else 0
+    return starts
+
+
+def state_allocator(state):
+    # seat allocator with the seats existing tickets hold already taken
+    allocator = SeatAllocator.from_tables(state['events'], state['subevents'], state['venues'], state['stages'], state['seats'])
+    allocator.mark_taken(state['tickets']['event_id'], state['tickets']['ticket_seat_id'])
+    return allocator
+
+
+def append_context(state, seed=None):
+    # the default seed depends on the dataset size, so appending twice doesn't repeat the same rows
+    starts = next_ids(state)
+    if seed is None:
+        seed = [cr.MASTER_SEED] + [starts[table] for table in APPEND_TABLES]
+    ctx = GeneratorContext(seed, tables=())
+    for table, record in APPEND_TABLES.items():
+        ctx.reset_ids((record,), starts[table])
+    return ctx
+
+
+def append_tables(write, state, ctx, n_customers=0, n_purchases=0, n_tickets=0):
+    # write(table, chunks, keep=()) like in generate_tables - a delta file writer or CopyLoader.write_chunks
+    customers = state['customers']
+    if n_customers:
+        new = write('customers', iter_chunks(create_customers, n_customers, cr.CHUNK_SIZE, ctx), keep=('customer_id',))
+        customers = {'customer_id': np.concatenate([customers['customer_id'], new['customer_id']])}
+        print(f"Appended {n_customers} customers")
+
+    # new tickets belong to the new purchases, or to the existing ones when there are none
+    purchases = state['purchases']
+    if n_purchases:
+        if not len(customers['customer_id']):
+            raise ValueError("No customers to make purchases for")
+        purchases = write('purchases', iter_chunks(create_purchases_batched, n_purchases, cr.CHUNK_SIZE, customers, ctx),
+                          keep=('purchase_id', 'purchase_total_price'))
+        print(f"Appended {n_purchases} purchases")
+
+    if n_tickets:
+        if not len(purchases['purchase_id']):
+            raise ValueError("No purchases for the new tickets to reference")
+        write('tickets', iter_chunks(create_tickets_batched, n_tickets, cr.CHUNK_SIZE, purchases, state_allocator(state), ctx))
+        print(f"Appended {n_tickets} tickets")
+
+
+def append_files(dir_name, n_customers=0, n_purchases=0, n_tickets=0, fmt=None, seed=None):
+    fmt = fmt or cr.OUTPUT_FORMAT
+    state = read_file_state(dir_name, fmt)
+    ctx = append_context(state, seed)
+    delta = next_delta(dir_name)
+
+    def write(table, chunks, keep=()):
+        return write_chunks(dir_name, delta_name(table, delta), chunks, keep=keep, fmt=fmt)
+
+    append_tables(write, state, ctx, n_customers, n_purchases, n_tickets)
+    print(f"Delta {delta} written to {dir_name}")
+
+
+def append_db(db_settings=None, n_customers=0, n_purchases=0, n_tickets=0, seed=None):
+    # indexes and foreign keys stay in place - a delta is small next to the tables it is checked against
+    import pg8000
+    from loader import CopyLoader, DB_SETTINGS, DB_TABLES
+    conn = pg8000.connect(**(db_settings or DB_SETTINGS))
+    try:
+        loader = CopyLoader(conn)
+        state = read_db_state(loader.cursor, DB_TABLES)
+        ctx = append_context(state, seed)
+        try:
+            append_tables(loader.write_chunks, state, ctx, n_customers, n_purchases, n_tickets)
+        finally:
+            conn.rollback()
+        loader.analyze()
+        return loader.loaded
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dir', default='data_full2', help='dataset to extend (ignored with --db)')
+    parser.add_argument('--db', action='store_true', help='append straight into postgres (loader.DB_SETTINGS)')
+    parser.add_argument('--format', choices=list(WRITERS), default=cr.OUTPUT_FORMAT)
+    parser.add_argument('--customers', type=int, default=0)
+    parser.add_argument('--purchases', type=int, default=0)
+    parser.add_argument('--tickets', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=None, help='default: derived from the current table sizes')
+    args = parser.parse_args()
+
+    if args.db:
+        append_db(n_customers=args.customers, n_purchases=args.purchases, n_tickets=args.tickets, seed=args.seed)
+    else:
+        append_files(args.dir, args.customers, args.purchases, args.tickets, fmt=args.format, seed=args.seed)
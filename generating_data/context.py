@@ -0,0 +1,40 @@
+import random
+import numpy as np
+from faker import Faker
+from pools import load_pools
+from tables import Ticket, Purchase, Customer, Event, Organizer, Subevent, Performer, Venue, Address, Stage, Seat, reset_ids
+
+
+
+###############################
+# GENERATOR CONTEXT
+
+ALL_TABLES = (Performer, Customer, Organizer, Venue, Address, Stage, Seat, Event, Subevent, Purchase, Ticket)
+
+
+class GeneratorContext:
+    # everything random the create_* functions touch, plus the id sequences - the same seed gives
+    # the same dataset whatever else ran in the process before (sanity_check, another table, ...)
+
+    def __init__(self, seed, locale='en_US', tables=ALL_TABLES, id_start=0):
+        self.seed = seed
+        self.locale = locale
+        # independent streams for numpy, random and Faker (Faker seeded with the same number
+        # as self.random would replay the same draws)
+        np_seed, py_seed, faker_seed = np.random.SeedSequence(seed).generate_state(3)
+        self.rng = np.random.default_rng(np_seed)
+        self.random = random.Random(int(py_seed))
+        self.faker = Faker(locale)
+        self.faker.seed_instance(int(faker_seed))
+        self.reset_ids(tables, id_start)
+        # (city, postal code) pairs, filled in by get_n_fake_cities
+        self.cities = []
+
+    @property
+    def pools(self):
+        # Faker value pools - shared by every context with this locale, cached on disk
+        return load_pools(self.locale)
+
+    def reset_ids(self, tables=ALL_TABLES, start=0):
+        for table in tables:
+            reset_ids(table, start)
@@ -1,31 +1,72 @@
-from re import M
-from torch import native_batch_norm
-from enums import EventStatus, PerformerType, SeatStatus, SubeventType, TicketType, VenueType
-from tables import Ticket, Purchase, Customer, Event, Organizer, Subevent, Performer, Venue, Address, Stage, Seat
+from enums import EventStatus, SeatStatus, SubeventType, TicketType, VenueType
+from tables import Event, Organizer, Subevent, Performer, Venue, Address, Stage, Seat
+from tables import TicketColumns, PurchaseColumns, CustomerColumns, EventColumns, OrganizerColumns, SubeventColumns, PerformerColumns, VenueColumns, AddressColumns, StageColumns, SeatColumns
 from datetime import datetime, date, timedelta
-import random
+import argparse
 import numpy as np
-from faker import Faker
-from faker.providers import DynamicProvider
-import pandas as pd
 import os
+from functools import partial
+from export import export_csv, iter_chunks, write_chunks
+from scale import SCALE_FACTOR, table_sizes
+from context import GeneratorContext
+from distributions import HOLIDAYS, HOLIDAY_SHARE, WEEKDAY_HOURS, WEEKDAY_HOUR_WEIGHTS, WEEKEND_HOURS, AGES, AGE_WEIGHTS
+from distributions import VENUE_TYPES, VENUE_TYPE_WEIGHTS, VENUE_SIZES, VENUE_SIZE_WEIGHTS
+from distributions import PURCHASE_MULTIPLIERS, PURCHASE_PRICE_STEPS, TICKET_PRICE_STEPS
+from distributions import PERFORMER_TYPES, PERFORMER_TYPE_WEIGHTS, POPULARITIES, POPULARITY_WEIGHTS, BAND_SHARE
+from distributions import STAGE_COUNTS, STAGE_COUNT_WEIGHTS, SUBEVENT_COUNTS, SUBEVENT_COUNT_WEIGHTS, TICKET_TYPES, TICKET_TYPE_WEIGHTS
+from sampling import AliasSampler
+from seating import SeatAllocator
 
 # Constants for US states and more populated states
 more_populated_states = ["California", "Texas", "Florida", "New York", "Illinois"]
 less_populated_states = ["Wyoming", "Vermont", "Alaska", "North Dakota", "South Dakota"]
 all_states = more_populated_states * 4 + less_populated_states  # Skew towards more populated states
 
-#(month, day)
-holidays = [
-    (1, 1),  # New Year's Day
-    (7, 4),  # Independence Day
-    (11, 28),  # Thanksgiving
-    (12, 25),  # Christmas
-    (2, 14),  # Valentine's Day
-    (10, 31),  # Halloween
-    (8, 1),  # Summer
-    (5, 20)  # May
-]
+# table sizes - all derived from one scale factor (scale.py), SF = 1 is 800k customers / 1M tickets
+def set_scale_factor(sf):
+    # parallel.py and loader.py read the N_* constants at call time, so this resizes them too
+    global SCALE_FACTOR, N_ORGANIZERS, N_PERFORMERS, N_CUSTOMERS, N_CITIES, N_VENUES, N_EVENTS, N_PURCHASES, N_TICKETS
+    sizes = table_sizes(sf)
+    SCALE_FACTOR = sf
+    N_ORGANIZERS = sizes['organizers']
+    N_PERFORMERS = sizes['performers']
+    N_CUSTOMERS = sizes['customers']
+    # ~4 venues in each of N_CITIES cities, ~40 events per venue in a year
+    N_CITIES = sizes['cities']
+    N_VENUES = sizes['venues']
+    N_EVENTS = sizes['events']
+    N_PURCHASES = sizes['purchases']
+    N_TICKETS = sizes['tickets']
+
+
+set_scale_factor(SCALE_FACTOR)
+
+# purchases and tickets drawn as whole numpy columns instead of row by row
+BATCHED = True
+
+# customers, purchases and tickets are generated and written to csv CHUNK_SIZE rows at a time
+CHUNK_SIZE = 100000
+
+# 'csv', 'parquet' (zstd) or 'arrow' (IPC file) - the columnar ones keep enums as categoricals and dates as timestamps
+OUTPUT_FORMAT = 'csv'
+
+# independent tables generated concurrently by parallel.py
+PARALLEL = False
+MASTER_SEED = 2137
+
+# weighted draws - alias tables built once, O(1) per draw (sampling.py)
+AGE_SAMPLER = AliasSampler(AGES, AGE_WEIGHTS)
+WEEKDAY_HOUR_SAMPLER = AliasSampler(WEEKDAY_HOURS, WEEKDAY_HOUR_WEIGHTS)
+PERFORMER_TYPE_SAMPLER = AliasSampler(PERFORMER_TYPES, PERFORMER_TYPE_WEIGHTS)
+POPULARITY_SAMPLER = AliasSampler(POPULARITIES, POPULARITY_WEIGHTS)
+BAND_SAMPLER = AliasSampler([True, False], [BAND_SHARE, 1 - BAND_SHARE])
+VENUE_TYPE_SAMPLER = AliasSampler(VENUE_TYPES, VENUE_TYPE_WEIGHTS)
+VENUE_SIZE_SAMPLERS = {venue_type: AliasSampler(VENUE_SIZES, weights) for venue_type, weights in VENUE_SIZE_WEIGHTS.items()}
+STADIUM_SUFFIX_SAMPLER = AliasSampler([" Stadium", ""], [0.7, 0.3])
+ARENA_SUFFIX_SAMPLER = AliasSampler([" Arena", ""], [0.7, 0.3])
+STAGE_COUNT_SAMPLER = AliasSampler(STAGE_COUNTS, STAGE_COUNT_WEIGHTS)
+SUBEVENT_COUNT_SAMPLER = AliasSampler(SUBEVENT_COUNTS, SUBEVENT_COUNT_WEIGHTS)
+TICKET_TYPE_SAMPLER = AliasSampler(TICKET_TYPES, TICKET_TYPE_WEIGHTS)
 
 
 def get_season(date: date):
@@ -40,158 +81,178 @@ def get_season(date: date):
     return "Winter"
 
 
-# generate customer birth date
-def generate_birth_date():
-    
-    age = np.random.choice(
-        range(18, 81),
-        p = [
-            0.2 / 3 if 18 <= x < 21 else   # Distribute 0.2 across ages 18, 19, 20
-            0.5 / 14 if 21 <= x < 35 else  # Distribute 0.5 across ages 21-35
-            0.2 / 25 if 35 <= x < 60 else  # Distribute 0.3 across ages 36-59
-            0.1 / 21 if 60 <= x <= 80 else  # Distribute 0.1 across ages 60-79
-            0
-            for x in range(18, 81)
-        ]
-    )
-    
-    birth_year = datetime.now().year - age
-    return datetime(birth_year, random.randint(1, 12), random.randint(1, 28))#.strftime('%Y-%m-%d')
-
-
-def generate_purchase_date():
-    if random.random() < 0.3:
-        d = random.choice(holidays)
+def generate_purchase_date(ctx):
+    if ctx.random.random() < HOLIDAY_SHARE:
+        d = ctx.random.choice(HOLIDAYS)
         date = datetime(2024, d[0], d[1])
     else:
-        date = datetime(2024, random.randint(1, 12), random.randint(1, 28))
+        date = datetime(2024, ctx.random.randint(1, 12), ctx.random.randint(1, 28))
 
     if date.weekday() < 5:  # Weekday
-        hour = np.random.choice(range(18, 21), p=[0.5, 0.3, 0.2])
+        hour = WEEKDAY_HOUR_SAMPLER.draw(ctx.random)
     else:  # Weekend
-        hour = np.random.choice(range(10, 18))
+        hour = ctx.random.choice(WEEKEND_HOURS)
 
-    minute = random.randint(0, 59)
+    minute = ctx.random.randint(0, 59)
     return date + timedelta(hours=int(hour), minutes=int(minute))
 
+
+# year, month, day arrays -> datetime64[D], no datetime object per row
+def to_datetime64(years, months, days):
+    month_starts = (np.asarray(years) - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (np.asarray(months) - 1)
+    return month_starts.astype('datetime64[D]') + (np.asarray(days) - 1)
+
+
+# customer birth dates - age from AGE_SAMPLER, any month, day 1-28, n dates at once as datetime64[D]
+def generate_birth_dates(n, ctx):
+    ages = AGE_SAMPLER.sample(ctx.rng, n)
+    months = ctx.rng.integers(1, 13, size=n)
+    days = ctx.rng.integers(1, 29, size=n)
+    return to_datetime64(datetime.now().year - ages, months, days)
+
+
+# batched generate_purchase_date - n dates at once as datetime64[s]
+def generate_purchase_dates(n, ctx):
+    holiday_months = np.array([h[0] for h in HOLIDAYS])
+    holiday_days = np.array([h[1] for h in HOLIDAYS])
+
+    is_holiday = ctx.rng.random(n) < HOLIDAY_SHARE
+    holiday_idx = ctx.rng.integers(0, len(HOLIDAYS), size=n)
+    months = np.where(is_holiday, holiday_months[holiday_idx], ctx.rng.integers(1, 13, size=n))
+    days = np.where(is_holiday, holiday_days[holiday_idx], ctx.rng.integers(1, 29, size=n))
+
+    dates = to_datetime64(2024, months, days)
+
+    # 1970-01-01 was a Thursday, so +3 gives Monday = 0 like datetime.weekday()
+    weekday = (dates.astype(np.int64) + 3) % 7
+    weekday_hours = WEEKDAY_HOUR_SAMPLER.sample(ctx.rng, n)
+    weekend_hours = ctx.rng.integers(WEEKEND_HOURS.start, WEEKEND_HOURS.stop, size=n)
+    hours = np.where(weekday < 5, weekday_hours, weekend_hours)
+    minutes = ctx.rng.integers(0, 60, size=n)
+
+    return dates.astype('datetime64[s]') + (hours * 3600 + minutes * 60).astype('timedelta64[s]')
+
 #####################################################################################################
 
 
-def create_performers(n_of_performers: int, faker: Faker):
+def create_performers(n_of_performers: int, ctx):
     
-    # [SINGER, DANCER, ACTOR, COMEDIAN, MUSICIAN, MAGICIAN, POET, ACROBAT, OTHER]
-    performer_types = [item for item in PerformerType]
-    performer_weights = [0.2, 0.1, 0.1,  0.2, 0.2, 0.05, 0.05, 0.02, 0.08]
+    # weighted columns and names drawn for all performers at once, row i takes entry i
+    popularities = POPULARITY_SAMPLER.sample(ctx.rng, n_of_performers).tolist()
+    performer_types = PERFORMER_TYPE_SAMPLER.sample(ctx.rng, n_of_performers).tolist()
+    bands = BAND_SAMPLER.sample(ctx.rng, n_of_performers).tolist()
+    band_names = ctx.pools.phrases(n_of_performers, 3, ctx.rng)
+    person_names = ctx.pools.sample('name', n_of_performers, ctx.rng)
     
-    popularities = [i for i in range(1, 11)]
-    #                       1    2    3    4      5   6    7,     8      9,    10
-    popularity_weights = [0.03, 0.1, 0.1, 0.185, 0.2, 0.2, 0.1, 0.05, 0.02, 0.015  ]
-    
-    def create_performer(faker):
+    def create_performer(i):
         
-        popularity = random.choices(popularities, weights=popularity_weights, k=1)[0]
-        performer_type = random.choices(performer_types, weights=performer_weights, k=1)[0]
+        popularity = popularities[i]
+        performer_type = performer_types[i]
         
-        is_a_band = random.choices([True, False], [0.3, 0.7], k=1)[0]
+        is_a_band = bands[i]
         if is_a_band:
-            name = faker.sentence(nb_words=3, variable_nb_words=True)[:-1]
+            name = band_names[i]
         else:
-            name = faker.name()
+            name = person_names[i]
         
         return Performer(name, performer_type, is_a_band, popularity)
     
     count = 0
     performers = []
     while(count != n_of_performers):
-        p = create_performer(faker)
+        p = create_performer(count)
         performers.append(p)
         count += 1
 
     return performers
 
 
-def create_customers(n_of_customers: int, faker: Faker):
+def create_customers(n_of_customers: int, ctx):
+    # every Faker-backed column drawn at once from the value pools (pools.py)
+    n = n_of_customers
+    pools = ctx.pools
+    names = pools.sample('first_name', n, ctx.rng)
+    surnames = pools.sample('last_name', n, ctx.rng)
     
-    def create_customer(faker):
-        name, surname = faker.first_name(), faker.last_name()
-        #email = faker.email()
-        email = name + surname + random.choice([str(random.randint(1, 10000)), ""]) + "@" + faker.sentence(nb_words=1).lower() + random.choice(["net", "com", "us"])
-        phone_nr = faker.phone_number()
-        birth_date = generate_birth_date()
-        return Customer(name, surname, email, phone_nr, birth_date)
+    #email = faker.email()
+    numbers = ctx.rng.integers(1, 10001, size=n).astype(str).astype(object)
+    numbers = np.where(ctx.rng.random(n) < 0.5, numbers, "")
+    # sentence(nb_words=1).lower() is always one word and a '.'
+    domains = pools.sample('word', n, ctx.rng) + "."
+    tlds = np.array(["net", "com", "us"], dtype=object)[ctx.rng.integers(0, 3, size=n)]
+    emails = names + surnames + numbers + "@" + domains + tlds
     
-    count = 0
-    customers = []
+    phone_nrs = pools.phone_numbers(n, ctx.rng)
+    birth_dates = generate_birth_dates(n, ctx)
     
-    while(count != n_of_customers):
-        client = create_customer(faker)
-        customers.append(client)
-        count += 1
-     
+    customers = CustomerColumns()
+    customers.extend(customer_name=names, customer_surname=surnames, customer_email=emails, customer_phone_number=phone_nrs, customer_birth_date=birth_dates)
     return customers
 
 
-def get_n_fake_cities(n, faker):
+def get_n_fake_cities(n, ctx):
+    faker = ctx.faker
     adrs = set()
     for _ in range(0, n):
         fake_city = faker.city()
         pcode = faker.postcode()
         adrs.add((fake_city, pcode))
     
-    adr_provider = DynamicProvider(
-        provider_name="fake_adr",
-        elements=list(adrs)
-    )
-    
-    faker.add_provider(adr_provider)
+    # sorted - set order changes with PYTHONHASHSEED; create_venues_and_addresses draws from this list
+    ctx.cities = sorted(adrs)
     return 
 
 
-def create_venues_and_addresses(n_of_venues: int, faker: Faker):
+def create_venues_and_addresses(n_of_venues: int, ctx):
     
-    venue_types = [item for item in VenueType]
-    # types:         PARK, STADIUM, ARENA, HALL
-    venues_weights = [0.2,   0.1,    0.3,    0.4]
-    # (min, max) for every size
-    venues_sizes = {"small": (200, 2000), "mid": (1000, 6000), "big": (8000, 30000), "huge": (30000, 100000) }
-    sizes = ["small", "mid", "big", "huge"]
+    venues_sizes = VENUE_SIZES
+    sizes = list(VENUE_SIZES)
     
-    def create_address(faker):
+    # Faker-backed columns drawn at once, row i takes entry i
+    n = n_of_venues
+    pools = ctx.pools
+    venue_types = VENUE_TYPE_SAMPLER.sample(ctx.rng, n).tolist()
+    venue_names = pools.phrases(n, 3, ctx.rng)
+    city_idx = ctx.rng.integers(0, len(ctx.cities), size=n)
+    streets = pools.sample('street_name', n, ctx.rng)
+    numbers = pools.building_number_values(n, ctx.rng) % np.array([10, 100, 1000])[ctx.rng.integers(0, 3, size=n)]
+    
+    def create_address(i):
         country = "United States"
-        adres = faker.fake_adr()
+        adres = ctx.cities[city_idx[i]]
         address_city = adres[0]
-        address_street = faker.street_name()
+        address_street = streets[i]
         address_postal_code = adres[1]
-        address_number = str( int(faker.building_number()) % random.choice([10, 100, 1000]) )
+        address_number = str(numbers[i])
         
         return Address(adr_country=country, adr_city=address_city, adr_street=address_street, adr_pcode=address_postal_code, adr_nr=address_number)
     
     
-    def create_venue_and_address(faker):
-        venue_type = random.choices(venue_types, weights=venues_weights, k=1)[0]
+    def create_venue_and_address(i):
+        venue_type = venue_types[i]
         match venue_type:
             case VenueType.PARK:
-                venue_size = random.choices(sizes, weights=[0.1, 0.2, 0.55, 0.15], k=1)[0]
-                venue_capacity = random.randint(venues_sizes[venue_size][0], venues_sizes[venue_size][1])
-                venue_name = faker.sentence(nb_words=3, variable_nb_words=True)[:-1] + " Park"
+                venue_size = VENUE_SIZE_SAMPLERS[VenueType.PARK].draw(ctx.random)
+                venue_capacity = ctx.random.randint(venues_sizes[venue_size][0], venues_sizes[venue_size][1])
+                venue_name = venue_names[i] + " Park"
             case VenueType.STADIUM:
-                venue_size = random.choices(sizes, weights=[0.01, 0.1, 0.65, 0.24], k=1)[0]
-                venue_capacity = random.randint(venues_sizes[venue_size][0], venues_sizes[venue_size][1])
-                venue_name = random.choice(["The ", ""]) + faker.sentence(nb_words=3, variable_nb_words=True)[:-1] + random.choices([" Stadium", ""], weights=[0.7, 0.3], k=1)[0]
+                venue_size = VENUE_SIZE_SAMPLERS[VenueType.STADIUM].draw(ctx.random)
+                venue_capacity = ctx.random.randint(venues_sizes[venue_size][0], venues_sizes[venue_size][1])
+                venue_name = ctx.random.choice(["The ", ""]) + venue_names[i] + STADIUM_SUFFIX_SAMPLER.draw(ctx.random)
             case VenueType.ARENA:
-                venue_size = random.choices(sizes, weights=[0.1, 0.7, 0.15, 0.05], k=1)[0]
-                venue_capacity = random.randint(venues_sizes[venue_size][0], venues_sizes[venue_size][1])
-                venue_name = random.choice(["The ", ""]) + faker.sentence(nb_words=3, variable_nb_words=True)[:-1] + random.choices([" Arena", ""], weights=[0.7, 0.3], k=1)[0]
+                venue_size = VENUE_SIZE_SAMPLERS[VenueType.ARENA].draw(ctx.random)
+                venue_capacity = ctx.random.randint(venues_sizes[venue_size][0], venues_sizes[venue_size][1])
+                venue_name = ctx.random.choice(["The ", ""]) + venue_names[i] + ARENA_SUFFIX_SAMPLER.draw(ctx.random)
             case VenueType.HALL:
-                venue_size = random.choices(sizes, weights=[0.4, 0.4, 0.1, 0.1], k=1)[0]
-                venue_capacity = random.randint(venues_sizes[venue_size][0], venues_sizes[venue_size][1])
-                venue_name = random.choice(["The ", ""]) + faker.sentence(nb_words=3, variable_nb_words=True)[:-1] + random.choices([" Stadium", ""], weights=[0.7, 0.3], k=1)[0]
+                venue_size = VENUE_SIZE_SAMPLERS[VenueType.HALL].draw(ctx.random)
+                venue_capacity = ctx.random.randint(venues_sizes[venue_size][0], venues_sizes[venue_size][1])
+                venue_name = ctx.random.choice(["The ", ""]) + venue_names[i] + STADIUM_SUFFIX_SAMPLER.draw(ctx.random)
             case _:
-                venue_name = "The " + faker.sentence(nb_words=2, variable_nb_words=True)
-                venue_capacity = random.randint(100, 10000)
-                venue_name = random.choice(sizes)
+                venue_name = "The " + venue_names[i]
+                venue_capacity = ctx.random.randint(100, 10000)
+                venue_name = ctx.random.choice(sizes)
         
-        venue_address = create_address(faker)
+        venue_address = create_address(i)
         return Venue(venue_name=venue_name, venue_type=venue_type, venue_address_id=venue_address.address_id, venue_capacity=venue_capacity, venue_size=venue_size), venue_address
         
 
@@ -200,7 +261,7 @@ def create_venues_and_addresses(n_of_venues: int, faker: Faker):
     addresses = []
     
     while(count != n_of_venues):
-        v, a = create_venue_and_address(faker)
+        v, a = create_venue_and_address(count)
         venues.append(v)
         addresses.append(a)
         count += 1
@@ -208,46 +269,51 @@ def create_venues_and_addresses(n_of_venues: int, faker: Faker):
     return venues, addresses
 
 
-def create_organizers(n_of_organizers: int, faker: Faker):
+def create_organizers(n_of_organizers: int, ctx):
+    names = ctx.pools.sample('name', n_of_organizers, ctx.rng)
+    domains = ctx.pools.sample('word', n_of_organizers, ctx.rng) + "."
     
-    def create_organizer(faker: Faker):
-        name = faker.name()
-        email = name.split(" ")[0] + name.split(" ")[1] + str(random.choice(["_biz", "_org", "_private", "_buisness"])) + "@" + random.choice(["contact.", ""]) + faker.sentence(nb_words=1).lower() + random.choice(["net", "com", "us"])    
+    def create_organizer(i):
+        name = names[i]
+        email = name.split(" ")[0] + name.split(" ")[1] + str(ctx.random.choice(["_biz", "_org", "_private", "_buisness"])) + "@" + ctx.random.choice(["contact.", ""]) + domains[i] + ctx.random.choice(["net", "com", "us"])    
         return Organizer(name, email)
     
     count = 0
     organizers = []
     
     while(count != n_of_organizers):
-        o = create_organizer(faker)
+        o = create_organizer(count)
         organizers.append(o)
         count += 1
     
     return organizers
 
 
-def create_seats(stages):
+def create_seats(stages, ctx):
+    # names and sectors built once - every seat references the same few strings
+    names = [f"s{i}" for i in range(100)]
+    sectors = [f"sector-{j}" for j in range(0, 10)]
     seats = []
     for stage in stages:
-        for i in range(10, random.randint(20, 100)):
-            name = f"s{i}"
+        for i in range(10, ctx.random.randint(20, 100)):
+            name = names[i]
             status = SeatStatus.AVAILABLE
-            sector = random.choice([f"sector-{j}" for j in range(0, 10)])
+            sector = ctx.random.choice(sectors)
             s = Seat(stage_id=stage.stage_id, seat_name=name, seat_status=status, seat_sector=sector)
             seats.append(s)
             
     return seats
 
 
-def create_stages(venues):
+def create_stages(venues, ctx):
     
     name_conv = {"text": ["A", "B", "C", "D", "E"], "numerical": ["1", "2", "3", "4", "5"], "other": ["main", "second", "third", "fourth", "fifth"]}
     convs = list(name_conv.keys())
     stages = []
-    for v in venues:
-        n_of_stages_in_venue = random.choices([i for i in range(1,6)], weights=[0.85, 0.11, 0.02, 0.01, 0.01], k=1)[0]
+    stage_counts = STAGE_COUNT_SAMPLER.sample(ctx.rng, len(venues)).tolist()
+    for v, n_of_stages_in_venue in zip(venues, stage_counts):
         #v_capacity = v.venue_capacity
-        conv = random.choice(convs)
+        conv = ctx.random.choice(convs)
         
         for i in range(0, n_of_stages_in_venue):
             stage = Stage(name_conv[conv][i], v.venue_id)
@@ -256,87 +322,108 @@ def create_stages(venues):
     return stages
 
 
-def create_events(n_of_events, faker, organizers):
+def create_events(n_of_events, ctx, organizers):
+    event_names = ctx.pools.phrases(n_of_events, 2, ctx.rng)
+    event_descriptions = ctx.pools.phrases(n_of_events, 20, ctx.rng)
+    
+    # start dates like purchase dates, 1-4 h 0-59 min long - drawn for all events at once
+    start_dates = generate_purchase_dates(n_of_events, ctx)
+    durations = ctx.rng.integers(1, 5, size=n_of_events) * 3600 + ctx.rng.integers(0, 60, size=n_of_events) * 60
+    end_dates = (start_dates + durations.astype('timedelta64[s]')).tolist()
+    start_dates = start_dates.tolist()
     
-    def create_event(organizer_weights, organizer_ids, faker):
+    def create_event(i):
         
-        event_name = faker.sentence(nb_words=2, variable_nb_words=True)[:-1] + random.choice([" Event", " Performance", " Party", ""])
-        organizer_id = np.random.choice(organizer_ids, p=organizer_weights) 
+        event_name = event_names[i] + ctx.random.choice([" Event", " Performance", " Party", ""])
+        organizer_id = organizer_col[i]
         
-        start_date = generate_purchase_date()
-        end_date = start_date + timedelta(hours=random.randint(1, 4), minutes=random.randint(0, 59))
+        start_date = start_dates[i]
+        end_date = end_dates[i]
         
-        event_description = faker.sentence(nb_words=20, variable_nb_words=True)[:-1]
-        event_status = random.choice([item for item in EventStatus])
+        event_description = event_descriptions[i]
+        event_status = ctx.random.choice([item for item in EventStatus])
         
         # DATA FOR SUBEVENTS        
         venue_artists = {'small': range(1, 6), 'mid': range(3, 7), 'big': range(6, 11), 'huge': range(7, 11)}
         event_size = list(venue_artists.keys())
-        event_size =  random.choice(event_size)
+        event_size =  ctx.random.choice(event_size)
         
-        n_of_subevents = np.random.choice([i for i in range(1, 5)], p=[0.75, 0.2, 0.04, 0.01])
+        n_of_subevents = subevent_counts[i]
         
         event = Event(organizer_id=organizer_id, event_name=event_name, event_start_date=start_date, event_end_date=end_date, event_description=event_description, event_status=event_status, n_of_subevents=n_of_subevents, event_size=event_size)
               
         return event
     
     
-    organizer_weights = np.random.dirichlet(np.ones(len(organizers)), size=1)[0] # Weighted organizer distribution
+    organizer_weights = ctx.rng.dirichlet(np.ones(len(organizers))) # Weighted organizer distribution
     organizer_ids = [o.organizer_id for o in organizers]
+    organizer_col = AliasSampler(organizer_ids, organizer_weights).sample(ctx.rng, n_of_events).tolist()
+    subevent_counts = SUBEVENT_COUNT_SAMPLER.sample(ctx.rng, n_of_events).tolist()
     
     count = 0
     events = []
     
     while(count != n_of_events):
-        e = create_event(organizer_weights, organizer_ids, faker)
+        e = create_event(count)
         events.append(e)
         count += 1
     
     return events
     
 
-def create_subevents(events, venues, performers):
+def create_subevents(events, venues, performers, ctx):
     venue_artists = {'small': range(1, 6), 'mid': range(3, 7), 'big': range(6, 11), 'huge': range(7, 11)}
         
     def create_subevent(venue, performer, subevent_start, subevent_end, event_id):
-        subevent_type = random.choice([item for item in SubeventType])
+        subevent_type = ctx.random.choice([item for item in SubeventType])
         return Subevent(event_id=event_id, subevent_type=subevent_type, venue_id=venue.venue_id, performer_id=performer.performer_id, subevent_start_date=subevent_start, subevent_end_date=subevent_end)
     
     
+    # performers indexed once by event size (popularity bucket) and by (event size, performer type),
+    # so every event only does O(1) draws instead of scanning all performers
+    performers_by_size = {size: [p for p in performers if p.popularity in popularities] for size, popularities in venue_artists.items()}
+    performers_by_size_type = {}
+    for size, matching in performers_by_size.items():
+        for p in matching:
+            performers_by_size_type.setdefault((size, p.performer_type), []).append(p)
+    
     subevents = []
     
     for e in events:
         n_of_subevents = e.event_n_of_subevents
         event_size = e.event_size
         
-        matching_venues_size = [venue for venue in venues if venue.venue_size]
-        matching_performers_size = [p for p in performers if p.popularity in venue_artists[event_size]]
+        matching_performers_size = performers_by_size[event_size]
         
         if len(matching_performers_size) != 0:
-            performer_1 = random.choice(matching_performers_size) 
+            performer_1 = ctx.random.choice(matching_performers_size) 
             performer_1_proffession = performer_1.performer_type
+            same_proffession = performers_by_size_type[(event_size, performer_1_proffession)]
         else:
             # screw it
-            performer_1 = random.choice([p for p in performers]) 
+            matching_performers_size = performers
+            performer_1 = ctx.random.choice(performers) 
             performer_1_proffession = performer_1.performer_type
+            same_proffession = [performer_1]
         
         if n_of_subevents != 1:
             matching_performer_set = [performer_1]
             #im giving 20 shots for different performers
             for _ in range(20):
-                performer_i = random.choice([p for p in matching_performers_size if p.performer_type==performer_1_proffession])
-                if performer_i:
-                    if performer_1 not in matching_performer_set and len(matching_performer_set) != n_of_subevents:
-                        matching_performer_set.append(performer_i)
+                if len(matching_performer_set) == n_of_subevents:
+                    break
+                performer_i = ctx.random.choice(same_proffession)
+                if performer_i not in matching_performer_set:
+                    matching_performer_set.append(performer_i)
             
             n_set = len(matching_performer_set)
             if n_set != n_of_subevents:
-                b_plan = random.choices(matching_performers_size, k=n_of_subevents-n_set)
+                b_plan = ctx.random.choices(matching_performers_size, k=n_of_subevents-n_set)
                 matching_performer_set.extend(b_plan)
         else:
             matching_performer_set = [performer_1]
         
-        venue = random.choice(matching_venues_size)
+        venue = ctx.random.choice(venues)
         
  
         total_seconds = (e.event_end_date - e.event_start_date).total_seconds()
@@ -351,74 +438,118 @@ def create_subevents(events, venues, performers):
     return subevents
     
 
-def create_tickets(n_of_tickets, purchases, events, seats):
+# seats: a SeatAllocator (seating.py) - a free seat at the event's venue for every ticket
+def create_tickets(n_of_tickets, purchases, seats, ctx):
     
-    def create_ticket(purchase, event, seat):
+    def create_ticket(purchase_id, purchase_total_price, event_id, seat_id):
         
-        ticket_type = random.choices([item for item in TicketType], weights=[0.8, 0.17, 0.03], k=1)[0]
-        ticket_price = random.choice([float(5)*0.5*p for p in range(1, 60) if float(10)*0.5*p < purchase.purchase_total_price])
+        ticket_type = TICKET_TYPE_SAMPLER.draw(ctx.random)
+        ticket_price = ctx.random.choice([price for price in TICKET_PRICE_STEPS if 2*price < purchase_total_price])
     
-        return Ticket(purchase_id=purchase.purchase_id, event_id=event.event_id, ticket_type=ticket_type, ticket_seat_id=seat.seat_id, ticket_price=ticket_price)
+        return dict(purchase_id=purchase_id, event_id=event_id, ticket_type=ticket_type, ticket_seat_id=seat_id, ticket_price=ticket_price)
     
     count = 0
-    tickets = []
+    tickets = TicketColumns()
+    # the seats of the whole chunk in one call, like create_tickets_batched
+    event_ids, seat_ids = seats.allocate(n_of_tickets, ctx.rng)
     
     while(count != n_of_tickets):
-        purchase = random.choice(purchases)
-        seat = random.choice(seats)
-        event = random.choice(events)
+        i = ctx.random.randrange(len(purchases['purchase_id']))
         
-        t = create_ticket(purchase, event, seat)
-        tickets.append(t)
+        tickets.add_row(**create_ticket(purchases['purchase_id'][i], purchases['purchase_total_price'][i], int(event_ids[count]), int(seat_ids[count])))
         count += 1
     
     return tickets
        
 
-def create_purchases(n_of_purchases, customers):
+def create_purchases(n_of_purchases, customers, ctx):
     
-    def create_purchase(customer):
-        price = random.randint(1, 5) * random.choice([float(10)*0.5*p for p in range(5, 50)])
-        p_date = generate_purchase_date()
-        return Purchase(customer_id=customer.customer_id, purchase_date=p_date, purchase_total_price=price)
+    def create_purchase(customer_id):
+        price = ctx.random.choice(PURCHASE_MULTIPLIERS) * ctx.random.choice(PURCHASE_PRICE_STEPS)
+        p_date = generate_purchase_date(ctx)
+        return dict(customer_id=customer_id, purchase_date=p_date, purchase_total_price=price)
     
     
     count = 0
-    purchases = []
+    purchases = PurchaseColumns()
+    customer_ids = customers['customer_id']
     
     while(count != n_of_purchases):
-        customer = random.choice(customers)
-        p = create_purchase(customer)
-        purchases.append(p)
+        purchases.add_row(**create_purchase(ctx.random.choice(customer_ids)))
         count += 1
     
     return purchases
-    
+
+
+#####################################################################################################
+# BATCHED MODE - whole columns drawn at once as numpy arrays, same distributions as above
+
+
+def create_purchases_batched(n_of_purchases, customers, ctx, purchase_dates=None):
+    # purchase_dates: datetime64 column to use instead of sampled 2024 dates (simulator.py)
+    customer_ids = np.asarray(customers['customer_id'])
+    price_steps = np.array(PURCHASE_PRICE_STEPS)
+
+    customer_col = customer_ids[ctx.rng.integers(0, len(customer_ids), size=n_of_purchases)]
+    total_prices = ctx.rng.integers(PURCHASE_MULTIPLIERS.start, PURCHASE_MULTIPLIERS.stop, size=n_of_purchases) * price_steps[ctx.rng.integers(0, len(price_steps), size=n_of_purchases)]
+    if purchase_dates is None:
+        purchase_dates = generate_purchase_dates(n_of_purchases, ctx)
+
+    purchases = PurchaseColumns()
+    purchases.extend(customer_id=customer_col, purchase_date=purchase_dates, purchase_total_price=total_prices)
+    return purchases
+
+
+def create_tickets_batched(n_of_tickets, purchases, seats, ctx):
+    purchase_idx = ctx.rng.integers(0, len(purchases['purchase_id']), size=n_of_tickets)
+    event_col, seat_col = seats.allocate(n_of_tickets, ctx.rng)
+
+    ticket_types = np.array([item.value for item in TicketType], dtype=np.int8)
+    ticket_type_col = ticket_types[TICKET_TYPE_SAMPLER.sample_index(ctx.rng, n_of_tickets)]
+
+    # create_ticket picks uniformly from TICKET_PRICE_STEPS (5*0.5*p for p in 1..59) with 10*0.5*p < total price,
+    # so the number of candidates only depends on the total price of the purchase
+    total_prices = np.asarray(purchases['purchase_total_price'])[purchase_idx]
+    n_candidates = np.clip(np.ceil(total_prices / 5).astype(np.int64) - 1, 1, 59)
+    p = (ctx.rng.random(n_of_tickets) * n_candidates).astype(np.int64) + 1
+    ticket_prices = float(5)*0.5*p
+
+    tickets = TicketColumns()
+    tickets.extend(purchase_id=np.asarray(purchases['purchase_id'])[purchase_idx], event_id=event_col, ticket_type=ticket_type_col,
+                   ticket_seat_id=seat_col, ticket_price=ticket_prices)
+    return tickets
+
+
+def purchase_creator():
+    return create_purchases_batched if BATCHED else create_purchases
+
+
+def ticket_creator():
+    return create_tickets_batched if BATCHED else create_tickets
 
 
 ############################################
 
 
 def sanity_check(n=15):
-    fake = Faker('en_US')
-    Faker.seed(2137)
-    get_n_fake_cities(8, fake)
+    # own context - doesn't shift the ids or random streams of a main() run in the same process
+    ctx = GeneratorContext(MASTER_SEED)
+    get_n_fake_cities(8, ctx)
   
     print("\n________________________\n")
     print("PERFORMERS")
-    pp = create_performers(n, fake)
+    pp = create_performers(n, ctx)
     for p in pp:
         print(f"id: {p.performer_id}, Name: {p.performer_name}, Type: {p.performer_type}, Popularity: {p.popularity}")
         
     print("\n________________________\n")
     print("CUSTOMERS")
-    cc = create_customers(n, fake)
-    for c in cc:
-        print(f"id: {c.customer_id}, Name: {c.customer_name}, surname: {c.customer_surname}, email: {c.customer_email}, phone number: {c.customer_phone_number}, birth date: {c.customer_birth_date}")
+    cc = create_customers(n, ctx)
+    print(cc.to_frame().to_string(index=False))
         
     print("\n________________________\n")
     print("ORGANIZERS")
-    oo = create_organizers(n, fake)
+    oo = create_organizers(n, ctx)
     for o in oo:
         print(f"id: {o.organizer_id}, Name: {o.organizer_name}, email: {o.organizer_email}")
         
@@ -426,7 +557,7 @@ def sanity_check(n=15):
     print("VENUES AND ADDRESSES")
     
     
-    vv, aa = create_venues_and_addresses(n, fake)
+    vv, aa = create_venues_and_addresses(n, ctx)
     for v,a in zip(vv, aa):
         print(f"Venue: {v.venue_id}, name: {v.venue_name}, type: {v.venue_type}, addres_id: {v.venue_address_id}, capacity: {v.venue_capacity}, size: {v.venue_size}")
         print(f"Adres: {a.address_id}, country: {a.address_country}, city: {a.address_city}, street: {a.address_street}, pcode: {a.address_postal_code}, nr: {a.address_number}\n")
@@ -434,181 +565,120 @@ def sanity_check(n=15):
     
     print("\n________________________\n")
     print("STAGES")
-    ss = create_stages(vv)
+    ss = create_stages(vv, ctx)
     for s in ss:
         print(f"Stage: {s.stage_id}, name: {s.stage_name}, venue_id: {s.venue_id}")
         
     print("\n________________________\n")
     print("SEATS")
-    sts = create_seats(ss)
+    sts = create_seats(ss, ctx)
     for st in sts[:10]:
         print(f"Seat: {st.seat_id}, stage: {st.stage_id}, name: {st.seat_name}, status: {st.seat_status}, sector: {st.seat_sector}")
           
     print("\n________________________\n")
     print("EVENTS")
-    ee = create_events(n, fake, oo)
+    ee = create_events(n, ctx, oo)
     for e in ee:
         print(f"EVENT id: {e.event_id}, Name: {e.event_name}, start: {e.event_start_date}, end: {e.event_end_date}, status: {e.event_status}, n of subevents: {e.event_n_of_subevents}, size: {e.event_size}")
     
     print("\n________________________\n")
     print("SUBEVENTS")
-    ses = create_subevents(ee, vv, pp)
+    ses = create_subevents(ee, vv, pp, ctx)
     for se in ses:
         print(f"SUBEVENT id: {se.subevent_id}, event_id: {se.event_id}, start: {se.subevent_start_date}, end: {se.subevent_end_date}, performer: {se.performer_id}, venue: {se.venue_id}, type: {se.subevent_type}")      
         
     print("\n________________________\n")
     print("PURCHASES")
-    prs = create_purchases(n, cc)
-    for pr in prs:
-        print(f"Purchase: {pr.purchase_id}, customer: {pr.customer_id}, total: {pr.purchase_total_price}, date: {pr.purchase_date}")
+    prs = create_purchases(n, cc, ctx)
+    print(prs.to_frame().to_string(index=False))
         
         
     print("\n________________________\n")
     print("TICKETS")
-    ts = create_tickets(n, prs, ee, sts)
-    for t in ts:
-        print(f"Ticket: {t.ticket_id}, purchase_id: {t.purchase_id}, price: {t.ticket_price}, event: {t.event_id}, type: {t.ticket_type}, seat_id: {t.ticket_seat_id}")
+    ts = create_tickets(n, prs, SeatAllocator.from_tables(ee, ses, vv, ss, sts), ctx)
+    print(ts.to_frame().to_string(index=False))
         
-    PERFORMERS = [p.to_dict() for p in pp]
-    CUSTOMERS = [c.to_dict() for c in cc]
-    ORGANIZERS = [o.to_dict() for o in oo]
-    VENUES = [v.to_dict() for v in vv]
-    ADDRESSES = [a.to_dict() for a in aa]
-    STAGES = [s.to_dict() for s in ss]
-    SEATS = [st.to_dict() for st in sts]
-    EVENTS = [e.to_dict() for e in ee]
-    SUBEVENTS = [se.to_dict() for se in ses]
-    PURCHASES = [pr.to_dict() for pr in prs]
-    TICKETS = [t.to_dict() for t in ts]
-    
-    # Convert data to DataFrames for export to CSV
-    df_addresses = pd.DataFrame(ADDRESSES)
-    df_venues = pd.DataFrame(VENUES)
-    df_organizers = pd.DataFrame(ORGANIZERS)
-    df_customers = pd.DataFrame(CUSTOMERS)
-    df_events = pd.DataFrame(EVENTS)
-    df_performers = pd.DataFrame(PERFORMERS)
-    df_stages = pd.DataFrame(STAGES)
-    df_seats = pd.DataFrame(SEATS)
-    df_subevents = pd.DataFrame(SUBEVENTS)
-    df_purchases = pd.DataFrame(PURCHASES)
-    df_tickets = pd.DataFrame(TICKETS)
-    
-    # Export to CSV
-    df_addresses.to_csv('data_sample/addresses.csv', index=False)
-    df_venues.to_csv('data_sample/venues.csv', index=False)
-    df_organizers.to_csv('data_sample/organizers.csv', index=False)
-    df_customers.to_csv('data_sample/customers.csv', index=False)
-    df_events.to_csv('data_sample/events.csv', index=False)
-    df_performers.to_csv('data_sample/performers.csv', index=False)
-    df_stages.to_csv('data_sample/stages.csv', index=False)
-    df_seats.to_csv('data_sample/seats.csv', index=False)
-    df_subevents.to_csv('data_sample/subevents.csv', index=False)
-    df_purchases.to_csv('data_sample/purchases.csv', index=False)
-    df_tickets.to_csv('data_sample/tickets.csv', index=False)
+    export_csv('data_sample', {
+        'addresses': AddressColumns.from_records(aa),
+        'venues': VenueColumns.from_records(vv),
+        'organizers': OrganizerColumns.from_records(oo),
+        'customers': cc,
+        'events': EventColumns.from_records(ee),
+        'performers': PerformerColumns.from_records(pp),
+        'stages': StageColumns.from_records(ss),
+        'seats': SeatColumns.from_records(sts),
+        'subevents': SubeventColumns.from_records(ses),
+        'purchases': prs,
+        'tickets': ts
+    })
 
     print("Data generation completed and saved to CSV files.")
     
   
-def main():
-    
-    dir_name = 'data_full2'
-    if not os.path.exists(dir_name):
-        os.makedirs(dir_name)
-    
-    
-    # reasonable imo
-    N_ORGANIZERS = 800
-    N_PERFORMERS = 17000
-    N_CUSTOMERS = 800000
-    
-    #n_venues ~500 miast z średnio 4 obiektami + 100
-    N_VENUES = 2100
-    
-    #n_venues * 40 (średnia liczba wydarzeń na obiekcie w ciągu roku)
-    N_EVENTS = 85000
-    
-    #tak o
-    N_PURCHASES = 950000
-    N_TICKETS = 1000000
-    
-    #500 miast o swoich kodach pocztowych
-    fake = Faker('en_US')
-    Faker.seed(2137)
-    get_n_fake_cities(500, fake)
-    
+def generate_tables(write, ctx):
+    # write(table, chunks, keep=()) gets every table as soon as it is generated, in FK-safe order
+    # (referenced tables first) - a csv writer in main(), COPY into postgres in loader.py
     print("Generating records:\n")
-    pp = create_performers(N_PERFORMERS, fake)
+    pp = create_performers(N_PERFORMERS, ctx)
+    write('performers', [PerformerColumns.from_records(pp)])
     print("Generating performers complete:\n")
-    cc = create_customers(N_CUSTOMERS, fake)
+    cc = write('customers', iter_chunks(create_customers, N_CUSTOMERS, CHUNK_SIZE, ctx), keep=('customer_id',))
     print("Generating customers complete:\n")
-    oo = create_organizers(N_ORGANIZERS, fake)  
+    oo = create_organizers(N_ORGANIZERS, ctx)  
+    write('organizers', [OrganizerColumns.from_records(oo)])
     print("Generating organizers complete:\n")
-    vv, aa = create_venues_and_addresses(N_VENUES, fake)
+    vv, aa = create_venues_and_addresses(N_VENUES, ctx)
+    write('addresses', [AddressColumns.from_records(aa)])
+    write('venues', [VenueColumns.from_records(vv)])
     print("Generating venues and addresses complete:\n")
-    ss = create_stages(vv)
+    ss = create_stages(vv, ctx)
+    write('stages', [StageColumns.from_records(ss)])
     print("Generating stages complete:\n")
-    sts = create_seats(ss)
+    sts = create_seats(ss, ctx)
+    write('seats', [SeatColumns.from_records(sts)])
     print("Generating seats complete:\n")
-    ee = create_events(N_EVENTS, fake, oo)
+    ee = create_events(N_EVENTS, ctx, oo)
+    write('events', [EventColumns.from_records(ee)])
     print("Generating events complete:\n")
-    ses = create_subevents(ee, vv, pp)
+    ses = create_subevents(ee, vv, pp, ctx)
+    write('subevents', [SubeventColumns.from_records(ses)])
     print("Generating subevents complete:\n")
-    prs = create_purchases(N_PURCHASES, cc)
+    # only ids and prices of purchases stay in memory for the tickets
+    prs = write('purchases', iter_chunks(purchase_creator(), N_PURCHASES, CHUNK_SIZE, cc, ctx), keep=('purchase_id', 'purchase_total_price'))
     print("Generating purchases complete:\n")
-    ts = create_tickets(N_TICKETS, prs, ee, sts)
+    # one allocator for all chunks - no seat is sold twice for the same event
+    allocator = SeatAllocator.from_tables(ee, ses, vv, ss, sts)
+    write('tickets', iter_chunks(ticket_creator(), N_TICKETS, CHUNK_SIZE, prs, allocator, ctx))
     print("Generating tickets complete:\n")
 
 
-    print("\nTransforming do dicts:")
-    PERFORMERS = [p.to_dict() for p in pp]
-    CUSTOMERS = [c.to_dict() for c in cc]
-    ORGANIZERS = [o.to_dict() for o in oo]
-    VENUES = [v.to_dict() for v in vv]
-    ADDRESSES = [a.to_dict() for a in aa]
-    STAGES = [s.to_dict() for s in ss]
-    SEATS = [st.to_dict() for st in sts]
-    EVENTS = [e.to_dict() for e in ee]
-    SUBEVENTS = [se.to_dict() for se in ses]
-    PURCHASES = [pr.to_dict() for pr in prs]
-    TICKETS = [t.to_dict() for t in ts]
-    
-    # Convert data to DataFrames for export to CSV
-    print("\nConverting to DFs:")
-    df_addresses = pd.DataFrame(ADDRESSES)
-    df_venues = pd.DataFrame(VENUES)
-    df_organizers = pd.DataFrame(ORGANIZERS)
-    df_customers = pd.DataFrame(CUSTOMERS)
-    df_events = pd.DataFrame(EVENTS)
-    df_performers = pd.DataFrame(PERFORMERS)
-    df_stages = pd.DataFrame(STAGES)
-    df_seats = pd.DataFrame(SEATS)
-    df_subevents = pd.DataFrame(SUBEVENTS)
-    df_purchases = pd.DataFrame(PURCHASES)
-    df_tickets = pd.DataFrame(TICKETS)
-    
-    # Export to CSV
-    print("\nExporting to csv:")
-    
-    
-    df_addresses.to_csv(f'{dir_name}/addresses.csv', index=False)
-    df_venues.to_csv(f'{dir_name}/venues.csv', index=False)
-    df_organizers.to_csv(f'{dir_name}/organizers.csv', index=False)
-    df_customers.to_csv(f'{dir_name}/customers.csv', index=False)
-    df_events.to_csv(f'{dir_name}/events.csv', index=False)
-    df_performers.to_csv(f'{dir_name}/performers.csv', index=False)
-    df_stages.to_csv(f'{dir_name}/stages.csv', index=False)
-    df_seats.to_csv(f'{dir_name}/seats.csv', index=False)
-    df_subevents.to_csv(f'{dir_name}/subevents.csv', index=False)
-    df_purchases.to_csv(f'{dir_name}/purchases.csv', index=False)
-    df_tickets.to_csv(f'{dir_name}/tickets.csv', index=False)
+def main():
+    
+    dir_name = 'data_full2'
+    if not os.path.exists(dir_name):
+        os.makedirs(dir_name)
+    
+    
+    if PARALLEL:
+        from parallel import generate_parallel
+        generate_parallel(dir_name, MASTER_SEED, scale_factor=SCALE_FACTOR)
+        return
+    
+    #500 miast o swoich kodach pocztowych
+    ctx = GeneratorContext(MASTER_SEED)
+    get_n_fake_cities(N_CITIES, ctx)
+    
+    generate_tables(partial(write_chunks, dir_name, fmt=OUTPUT_FORMAT), ctx)
 
-    print("Data generation completed and saved to CSV files.")
+    print(f"Data generation completed and saved to {OUTPUT_FORMAT} files.")
     
 
 
 if __name__ == '__main__':
     
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sf', type=float, default=SCALE_FACTOR, help='scale factor, 1 = 800k customers / 1M tickets')
+    set_scale_factor(parser.parse_args().sf)
     main()
     #sanity_check(50)
     
\ No newline at end of file
@@ -0,0 +1,79 @@
+from enums import PerformerType, TicketType, VenueType
+
+
+
+###############################
+# DISTRIBUTIONS
+# shared by create_records.py and the lab6 workload templates, so the benchmark
+# parameters are drawn the same way the data was
+
+#(month, day)
+HOLIDAYS = [
+    (1, 1),  # New Year's Day
+    (7, 4),  # Independence Day
+    (11, 28),  # Thanksgiving
+    (12, 25),  # Christmas
+    (2, 14),  # Valentine's Day
+    (10, 31),  # Halloween
+    (8, 1),  # Summer
+    (5, 20)  # May
+]
+
+# share of purchase / event dates that fall on one of the holidays
+HOLIDAY_SHARE = 0.3
+
+# purchase / event start hours: weekday evenings, weekend daytime (uniform)
+WEEKDAY_HOURS = range(18, 21)
+WEEKDAY_HOUR_WEIGHTS = [0.5, 0.3, 0.2]
+WEEKEND_HOURS = range(10, 18)
+
+# customer ages: 0.2 across 18-20, 0.5 across 21-34, 0.2 across 35-59, 0.1 across 60-80
+AGES = range(18, 81)
+AGE_WEIGHTS = [
+    0.2 / 3 if 18 <= x < 21 else
+    0.5 / 14 if 21 <= x < 35 else
+    0.2 / 25 if 35 <= x < 60 else
+    0.1 / 21
+    for x in AGES
+]
+
+# types:         PARK, STADIUM, ARENA, HALL
+VENUE_TYPES = [item for item in VenueType]
+VENUE_TYPE_WEIGHTS = [0.2, 0.1, 0.3, 0.4]
+
+# (min, max) capacity for every size
+VENUE_SIZES = {"small": (200, 2000), "mid": (1000, 6000), "big": (8000, 30000), "huge": (30000, 100000)}
+# weights of small, mid, big, huge per venue type
+VENUE_SIZE_WEIGHTS = {
+    VenueType.PARK: [0.1, 0.2, 0.55, 0.15],
+    VenueType.STADIUM: [0.01, 0.1, 0.65, 0.24],
+    VenueType.ARENA: [0.1, 0.7, 0.15, 0.05],
+    VenueType.HALL: [0.4, 0.4, 0.1, 0.1],
+}
+
+# types:                 SINGER, DANCER, ACTOR, COMEDIAN, MUSICIAN, MAGICIAN, POET, ACROBAT, OTHER
+PERFORMER_TYPES = [item for item in PerformerType]
+PERFORMER_TYPE_WEIGHTS = [0.2, 0.1, 0.1,  0.2, 0.2, 0.05, 0.05, 0.02, 0.08]
+POPULARITIES = range(1, 11)
+#                       1    2    3    4      5   6    7,     8      9,    10
+POPULARITY_WEIGHTS = [0.03, 0.1, 0.1, 0.185, 0.2, 0.2, 0.1, 0.05, 0.02, 0.015]
+BAND_SHARE = 0.3
+
+# stages per venue: 1..5
+STAGE_COUNTS = range(1, 6)
+STAGE_COUNT_WEIGHTS = [0.85, 0.11, 0.02, 0.01, 0.01]
+
+# subevents per event: 1..4
+SUBEVENT_COUNTS = range(1, 5)
+SUBEVENT_COUNT_WEIGHTS = [0.75, 0.2, 0.04, 0.01]
+
+# types:         NORMAL, MEET_AND_GREET, VIP
+TICKET_TYPES = [item for item in TicketType]
+TICKET_TYPE_WEIGHTS = [0.8, 0.17, 0.03]
+
+# purchase total = multiplier * step
+PURCHASE_MULTIPLIERS = range(1, 6)
+PURCHASE_PRICE_STEPS = [float(10)*0.5*p for p in range(5, 50)]
+
+# ticket price steps, only the ones with 10*0.5*p < purchase total are allowed
+TICKET_PRICE_STEPS = [float(5)*0.5*p for p in range(1, 60)]
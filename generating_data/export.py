@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+
+
+###############################
+# CSV EXPORT
+
+
+def export_csv(dir_name, tables):
+    # tables: {file name: columnar builder}
+    for name, columns in tables.items():
+        columns.to_frame().to_csv(f'{dir_name}/{name}.csv', index=False)
+
+
+def iter_chunks(create, n_rows, chunk_size, *args):
+    # calls create(rows, *args) with at most chunk_size rows at a time - the id sequences
+    # carry on between calls, so the chunks together are the same table as one big call
+    done = 0
+    while done < n_rows:
+        rows = min(chunk_size, n_rows - done)
+        yield create(rows, *args)
+        done += rows
+
+
+class CsvWriter:
+    # appends chunks (columnar builders) to one csv, header only before the first chunk
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', newline='')
+        self.rows = 0
+
+    def write(self, columns):
+        columns.to_frame().to_csv(self.file, header=self.rows == 0, index=False)
+        self.rows += len(columns)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetWriter(CsvWriter):
+    # one row group per chunk, the schema comes from the first chunk
+
+    def __init__(self, path, compression='zstd'):
+        self.path = path
+        self.compression = compression
+        self.writer = None
+        self.rows = 0
+
+    def write(self, columns):
+        import pyarrow.parquet as pq
+        table = columns.to_arrow()
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema, compression=self.compression)
+        self.writer.write_table(table)
+        self.rows += len(columns)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class ArrowWriter(ParquetWriter):
+    # Arrow IPC file - can be memory-mapped with pyarrow.ipc.open_file(pyarrow.memory_map(path))
+
+    def write(self, columns):
+        import pyarrow as pa
+        table = columns.to_arrow()
+        if self.writer is None:
+            self.writer = pa.ipc.new_file(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows += len(columns)
+
+
+# format: (writer, file extension)
+WRITERS = {
+    'csv': (CsvWriter, 'csv'),
+    'parquet': (ParquetWriter, 'parquet'),
+    'arrow': (ArrowWriter, 'arrow'),
+}
+
+
+def write_chunks(dir_name, table, chunks, keep=(), fmt='csv'):
+    # streams the chunks to <dir_name>/<table>.<ext>, only the `keep` columns stay in memory
+    # (e.g. ids and prices later tables sample from)
+    writer_cls, ext = WRITERS[fmt]
+    kept = {column: [] for column in keep}
+    with writer_cls(f'{dir_name}/{table}.{ext}') as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+            for column in keep:
+                kept[column].append(np.asarray(chunk[column]))
+
+    return {column: np.concatenate(parts) if parts else np.array([]) for column, parts in kept.items()}
+
+
+def read_columns(path, columns, fmt='csv'):
+    # reads back only `columns` of a file written by write_chunks, as numpy arrays
+    columns = list(columns)
+    if fmt == 'csv':
+        frame = pd.read_csv(path, usecols=columns)
+    elif fmt == 'parquet':
+        frame = pd.read_parquet(path, columns=columns)
+    else:
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            frame = pa.ipc.open_file(source).read_all().select(columns).to_pandas()
+    return {column: frame[column].to_numpy() for column in columns}
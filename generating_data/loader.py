@@ -0,0 +1,159 @@
+import argparse
+import io
+import time
+import numpy as np
+import pg8000
+from context import GeneratorContext
+import create_records as cr
+from create_records import generate_tables, get_n_fake_cities
+
+DB_SETTINGS = {
+    "database": "bazy",
+    "user": "postgres",
+    "password": "Maciejewski12",
+    "host": "localhost",
+    "port": 5432
+}
+
+# csv name -> table in the db, in FK-safe order (referenced tables first)
+DB_TABLES = {
+    'performers': 'Performer',
+    'customers': 'Customer',
+    'organizers': 'Organizer',
+    'addresses': 'Address',
+    'venues': 'Venue',
+    'stages': 'Stage',
+    'seats': 'Seat',
+    'events': 'Event',
+    'subevents': 'Subevent',
+    'purchases': 'Purchase',
+    'tickets': 'Ticket',
+}
+
+BATCH_SIZE = 100000
+
+
+
+###############################
+# COPY LOADER
+#
+# Generated chunks go straight into postgres with COPY FROM STDIN, no csv files on the way.
+# The tables are truncated first - the generator starts every id sequence at 0 (to grow an existing
+# database use append.py).
+# Secondary indexes and foreign keys are dropped before the load and created again after it,
+# then the tables get ANALYZE'd.
+
+
+class CopyLoader:
+
+    def __init__(self, conn, batch_size=BATCH_SIZE):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.batch_size = batch_size
+        self.deferred_indexes = []
+        self.deferred_constraints = []
+        self.loaded = {}
+
+    def truncate(self, tables):
+        self.cursor.execute(f"TRUNCATE {', '.join(tables)} CASCADE;")
+        self.conn.commit()
+
+    def defer_indexes_and_constraints(self, tables):
+        # remembers the DDL of foreign keys and non-constraint indexes, then drops them
+        for table in tables:
+            self.cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f';", (table,))
+            for name, definition in self.cursor.fetchall():
+                self.deferred_constraints.append((table, name, definition))
+
+            self.cursor.execute(
+                "SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+                "WHERE i.indrelid = %s::regclass AND NOT i.indisprimary "
+                "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid);", (table,))
+            self.deferred_indexes.extend(self.cursor.fetchall())
+
+        for table, name, _ in self.deferred_constraints:
+            self.cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}";')
+        for name, _ in self.deferred_indexes:
+            self.cursor.execute(f"DROP INDEX {name};")
+        self.conn.commit()
+        print(f"Deferred {len(self.deferred_indexes)} indexes and {len(self.deferred_constraints)} foreign keys")
+
+    def restore_indexes_and_constraints(self):
+        for name, definition in self.deferred_indexes:
+            start = time.perf_counter()
+            self.cursor.execute(definition + ";")
+            print(f"Index {name} created in {time.perf_counter() - start:.2f} s")
+        for table, name, definition in self.deferred_constraints:
+            start = time.perf_counter()
+            self.cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition};')
+            print(f"Constraint {name} created in {time.perf_counter() - start:.2f} s")
+        self.conn.commit()
+        self.deferred_indexes, self.deferred_constraints = [], []
+
+    def copy_frame(self, table, frame):
+        columns = ", ".join(frame.columns)
+        for start in range(0, len(frame), self.batch_size):
+            buffer = io.BytesIO(frame.iloc[start:start + self.batch_size].to_csv(header=False, index=False).encode())
+            self.cursor.execute(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv);", stream=buffer)
+
+    def write_chunks(self, name, chunks, keep=()):
+        # same signature as export.write_chunks, so generate_tables can use either
+        table = DB_TABLES[name]
+        kept = {column: [] for column in keep}
+        rows = 0
+        start = time.perf_counter()
+        for chunk in chunks:
+            self.copy_frame(table, chunk.to_frame())
+            rows += len(chunk)
+            for column in keep:
+                kept[column].append(np.asarray(chunk[column]))
+        self.conn.commit()
+
+        elapsed = time.perf_counter() - start
+        self.loaded[table] = rows
+        print(f"Loaded {rows} rows into {table} in {elapsed:.2f} s")
+        return {column: np.concatenate(parts) if parts else np.array([]) for column, parts in kept.items()}
+
+    def analyze(self):
+        for table in self.loaded:
+            self.cursor.execute(f"ANALYZE {table};")
+        self.conn.commit()
+
+
+def load(db_settings=DB_SETTINGS, batch_size=BATCH_SIZE):
+    conn = pg8000.connect(**db_settings)
+    try:
+        loader = CopyLoader(conn, batch_size)
+        tables = list(DB_TABLES.values())
+        loader.truncate(tables)
+        loader.defer_indexes_and_constraints(tables)
+
+        try:
+            ctx = GeneratorContext(cr.MASTER_SEED)
+            get_n_fake_cities(cr.N_CITIES, ctx)
+            generate_tables(loader.write_chunks, ctx)
+        except BaseException:
+            # put the schema back after a partial load, but the load error is the one to report
+            conn.rollback()
+            try:
+                loader.restore_indexes_and_constraints()
+            except Exception as e:
+                print(f"Restoring indexes and constraints failed: {e}")
+                conn.rollback()
+            raise
+        loader.restore_indexes_and_constraints()
+        loader.analyze()
+        print("Data generation completed and loaded into the database.")
+        return loader.loaded
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sf', type=float, default=cr.SCALE_FACTOR, help='scale factor, 1 = 800k customers / 1M tickets')
+    cr.set_scale_factor(parser.parse_args().sf)
+    load()
@@ -20,6 +20,9 @@ holidays = [
     datetime(2024, 5, 20)  # May
 ]
 
+# customers per chunk - customers, purchases and tickets are written to csv this many customers at a time
+CHUNK_SIZE = 100000
+
 # Helper function to generate customer birth dates
 def generate_birth_date():
     current_year = datetime.now().year
@@ -92,9 +95,13 @@ def generate_organizers(num_organizers):
     return organizers
 
 # Generate customers with skewed age distribution
-def generate_customers(num_customers):
+def generate_customers(num_customers, chunk_size=CHUNK_SIZE):
+    # yields the customers chunk_size at a time
     customers = []
     for customer_id in range(1, num_customers + 1):
+        if len(customers) == chunk_size:
+            yield customers
+            customers = []
         customers.append({
             "customer_id": customer_id,
             "customer_name": f"Name{customer_id}",
@@ -103,7 +110,8 @@ def generate_customers(num_customers):
             "customer_phone_number": f"{random.randint(100000000, 999999999)}",
             "customer_birth_date": generate_birth_date()
         })
-    return customers
+    if customers:
+        yield customers
 
 # Generate subevents with weighted performers
 def generate_subevents(events, performers, venue_ids):
@@ -199,20 +207,23 @@ def generate_stages_and_seats(venues):
             seat_id += 1
     return stages, seats
 
-# Generate purchases and tickets
-def generate_purchases_and_tickets(customers, events):
+# Generate purchases and tickets, yielded for chunk_size customers at a time
+def generate_purchases_and_tickets(num_customers, events, chunk_size=CHUNK_SIZE):
     purchases = []
     tickets = []
     purchase_id = 1
     ticket_id = 1
-    for customer in customers:
+    for customer_id in range(1, num_customers + 1):
+        if (customer_id - 1) % chunk_size == 0 and purchases:
+            yield purchases, tickets
+            purchases, tickets = [], []
         num_purchases = random.randint(1, 3)
         for _ in range(num_purchases):
             purchase_date = generate_purchase_date()
             total_price = round(random.uniform(20, 200), 2)
             purchases.append({
                 "purchase_id": purchase_id,
-                "customer_id": customer["customer_id"],
+                "customer_id": customer_id,
                 "purchase_date": purchase_date.strftime('%Y-%m-%d %H:%M:%S'),
                 "purchase_total_price": total_price
             })
@@ -233,7 +244,12 @@ def generate_purchases_and_tickets(customers, events):
                 ticket_id += 1
 
             purchase_id += 1
-    return purchases, tickets
+    if purchases:
+        yield purchases, tickets
+
+
+def append_csv(file, rows, header):
+    pd.DataFrame(rows).to_csv(file, header=header, index=False)
 
 
 if __name__ == '__main__':
@@ -247,37 +263,37 @@ if __name__ == '__main__':
     # Generate data
     venues, addresses = generate_venues(NUM_VENUES)
     organizers = generate_organizers(NUM_ORGANIZERS)
-    customers = generate_customers(NUM_CUSTOMERS)
+    # customers, purchases and tickets go to csv chunk by chunk, only the other tables stay in memory
+    with open('data/customers.csv', 'w', newline='') as file:
+        for i, customers in enumerate(generate_customers(NUM_CUSTOMERS)):
+            append_csv(file, customers, header=i == 0)
     events = generate_events(NUM_EVENTS, [org["organizer_id"] for org in organizers], [venue["venue_id"] for venue in venues])
     performers = generate_performers(NUM_PERFORMERS)
     stages, seats = generate_stages_and_seats(venues)
     subevents = generate_subevents(events, performers, [venue["venue_id"] for venue in venues])
-    purchases, tickets = generate_purchases_and_tickets(customers, events)
+    with open('data/purchases.csv', 'w', newline='') as purchases_file, open('data/tickets.csv', 'w', newline='') as tickets_file:
+        for i, (purchases, tickets) in enumerate(generate_purchases_and_tickets(NUM_CUSTOMERS, events)):
+            append_csv(purchases_file, purchases, header=i == 0)
+            append_csv(tickets_file, tickets, header=i == 0)
 
     # Convert data to DataFrames for export to CSV
     df_addresses = pd.DataFrame(addresses)
     df_venues = pd.DataFrame(venues)
     df_organizers = pd.DataFrame(organizers)
-    df_customers = pd.DataFrame(customers)
     df_events = pd.DataFrame(events)
     df_performers = pd.DataFrame(performers)
     df_stages = pd.DataFrame(stages)
     df_seats = pd.DataFrame(seats)
     df_subevents = pd.DataFrame(subevents)
-    df_purchases = pd.DataFrame(purchases)
-    df_tickets = pd.DataFrame(tickets)
 
     # Export to CSV
     df_addresses.to_csv('data/addresses.csv', index=False)
     df_venues.to_csv('data/venues.csv', index=False)
     df_organizers.to_csv('data/organizers.csv', index=False)
-    df_customers.to_csv('data/customers.csv', index=False)
     df_events.to_csv('data/events.csv', index=False)
     df_performers.to_csv('data/performers.csv', index=False)
     df_stages.to_csv('data/stages.csv', index=False)
     df_seats.to_csv('data/seats.csv', index=False)
     df_subevents.to_csv('data/subevents.csv', index=False)
-    df_purchases.to_csv('data/purchases.csv', index=False)
-    df_tickets.to_csv('data/tickets.csv', index=False)
 
     print("Data generation completed and saved to CSV files.")
@@ -0,0 +1,292 @@
+import argparse
+import os
+import shutil
+import zlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from context import GeneratorContext
+from tables import Ticket, Purchase, Customer, Event, Organizer, Subevent, Performer, Venue, Address, Stage, Seat
+from tables import EventColumns, OrganizerColumns, SubeventColumns, PerformerColumns, VenueColumns, AddressColumns, StageColumns, SeatColumns
+from create_records import create_performers, create_customers, create_organizers, create_venues_and_addresses, create_stages, create_seats
+from create_records import create_events, create_subevents, purchase_creator, ticket_creator, get_n_fake_cities
+from export import WRITERS, iter_chunks, write_chunks
+from seating import SeatAllocator
+import create_records as cr
+
+
+###############################
+# TABLE DEPENDENCY GRAPH
+#
+# table: tables it needs. Everything without a path between them runs at the same time, e.g.
+# customers -> purchases -> tickets next to venues -> stages -> seats.
+
+DEPENDENCIES = {
+    'performers': (),
+    'customers': (),
+    'organizers': (),
+    'venues': (),
+    'stages': ('venues',),
+    'seats': ('stages',),
+    'events': ('organizers',),
+    'subevents': ('events', 'venues', 'performers'),
+    'purchases': ('customers',),
+    'tickets': ('purchases', 'events', 'subevents', 'venues', 'stages', 'seats'),
+}
+
+# tables split into id-range shards when run as a script, e.g. for 10M+ customer stress datasets
+SHARDS = {'customers': os.cpu_count(), 'tickets': os.cpu_count()}
+
+# id sequences owned by every table task (venues also hand out the address ids)
+ID_TABLES = {
+    'performers': (Performer,),
+    'customers': (Customer,),
+    'organizers': (Organizer,),
+    'venues': (Venue, Address),
+    'stages': (Stage,),
+    'seats': (Seat,),
+    'events': (Event,),
+    'subevents': (Subevent,),
+    'purchases': (Purchase,),
+    'tickets': (Ticket,),
+}
+
+
+def table_seed(master_seed, table):
+    # same table -> same seed, independent of the order tasks get scheduled in
+    return (master_seed + zlib.crc32(table.encode())) % 2**32
+
+
+###############################
+# TABLE TASKS
+#
+# Each task writes its own csv and returns only what the dependent tables need.
+
+
+def _performers(ctx, dir_name):
+    pp = create_performers(cr.N_PERFORMERS, ctx)
+    write_chunks(dir_name, 'performers', [PerformerColumns.from_records(pp)], fmt=cr.OUTPUT_FORMAT)
+    return pp
+
+
+def _customers(ctx, dir_name, rows, out_name):
+    return write_chunks(dir_name, out_name, iter_chunks(create_customers, rows, cr.CHUNK_SIZE, ctx), keep=('customer_id',), fmt=cr.OUTPUT_FORMAT)
+
+
+def _organizers(ctx, dir_name):
+    oo = create_organizers(cr.N_ORGANIZERS, ctx)
+    write_chunks(dir_name, 'organizers', [OrganizerColumns.from_records(oo)], fmt=cr.OUTPUT_FORMAT)
+    return oo
+
+
+def _venues(ctx, dir_name):
+    get_n_fake_cities(cr.N_CITIES, ctx)
+    vv, aa = create_venues_and_addresses(cr.N_VENUES, ctx)
+    write_chunks(dir_name, 'addresses', [AddressColumns.from_records(aa)], fmt=cr.OUTPUT_FORMAT)
+    write_chunks(dir_name, 'venues', [VenueColumns.from_records(vv)], fmt=cr.OUTPUT_FORMAT)
+    return vv
+
+
+def _stages(ctx, dir_name, venues):
+    ss = create_stages(venues, ctx)
+    write_chunks(dir_name, 'stages', [StageColumns.from_records(ss)], fmt=cr.OUTPUT_FORMAT)
+    return ss
+
+
+def _seats(ctx, dir_name, stages):
+    sts = create_seats(stages, ctx)
+    write_chunks(dir_name, 'seats', [SeatColumns.from_records(sts)], fmt=cr.OUTPUT_FORMAT)
+    return sts
+
+
+def _events(ctx, dir_name, organizers):
+    ee = create_events(cr.N_EVENTS, ctx, organizers)
+    write_chunks(dir_name, 'events', [EventColumns.from_records(ee)], fmt=cr.OUTPUT_FORMAT)
+    return ee
+
+
+def _subevents(ctx, dir_name, events, venues, performers):
+    ses = create_subevents(events, venues, performers, ctx)
+    subevents = SubeventColumns.from_records(ses)
+    write_chunks(dir_name, 'subevents', [subevents], fmt=cr.OUTPUT_FORMAT)
+    # the venue of every event, for the seat allocator of the tickets
+    return {'event_id': np.asarray(subevents['event_id']), 'venue_id': np.asarray(subevents['venue_id'])}
+
+
+def _purchases(ctx, dir_name, rows, out_name, customers):
+    chunks = iter_chunks(purchase_creator(), rows, cr.CHUNK_SIZE, customers, ctx)
+    return write_chunks(dir_name, out_name, chunks, keep=('purchase_id', 'purchase_total_price'), fmt=cr.OUTPUT_FORMAT)
+
+
+def _tickets(ctx, dir_name, rows, out_name, purchases, events, subevents, venues, stages, seats, shard=0, n_shards=1):
+    # every shard sells the tickets of its own events (every n_shards-th one), so shards can't book the same seat
+    sellable = np.arange(len(events)) % n_shards == shard
+    allocator = SeatAllocator.from_tables(events, subevents, venues, stages, seats, sellable)
+    write_chunks(dir_name, out_name, iter_chunks(ticket_creator(), rows, cr.CHUNK_SIZE, purchases, allocator, ctx), fmt=cr.OUTPUT_FORMAT)
+    return None
+
+
+TASKS = {
+    'performers': _performers,
+    'customers': _customers,
+    'organizers': _organizers,
+    'venues': _venues,
+    'stages': _stages,
+    'seats': _seats,
+    'events': _events,
+    'subevents': _subevents,
+    'purchases': _purchases,
+    'tickets': _tickets,
+}
+
+
+def run_table(table, master_seed, dir_name, inputs, shard=None, n_shards=1, scale_factor=None):
+    if scale_factor is not None:
+        # the worker may be a fresh interpreter with the default sizes
+        cr.set_scale_factor(scale_factor)
+    if shard is None:
+        seed = table_seed(master_seed, table)
+        rows, id_start, out_name = row_counts().get(table), 0, table
+    else:
+        # every shard owns one id range and has its own seed - output only depends on (seed, n_shards)
+        seed = table_seed(master_seed, f"{table}.{shard}")
+        id_start, rows = shard_ranges(row_counts()[table], n_shards)[shard]
+        out_name = part_name(table, shard)
+
+    # only this table's id sequences are restarted - a worker process runs many tasks
+    ctx = GeneratorContext(seed, tables=ID_TABLES[table], id_start=id_start)
+
+    if table == 'tickets':
+        return TASKS[table](ctx, dir_name, rows, out_name, shard=shard or 0, n_shards=n_shards, **inputs)
+    if table in SHARDABLE:
+        return TASKS[table](ctx, dir_name, rows, out_name, **inputs)
+    return TASKS[table](ctx, dir_name, **inputs)
+
+
+###############################
+# SHARDS
+#
+# One big table split into consecutive id ranges, each generated by its own process.
+
+SHARDABLE = ('customers', 'purchases', 'tickets')
+
+
+def row_counts():
+    return {'customers': cr.N_CUSTOMERS, 'purchases': cr.N_PURCHASES, 'tickets': cr.N_TICKETS}
+
+
+def shard_ranges(n_rows, n_shards):
+    # [(first id, number of rows)] - the first n_rows % n_shards shards get one row more
+    base, extra = divmod(n_rows, n_shards)
+    ranges = []
+    start = 0
+    for i in range(n_shards):
+        count = base + (1 if i < extra else 0)
+        ranges.append((start, count))
+        start += count
+    return ranges
+
+
+def part_name(table, shard):
+    return f"{table}.part-{shard:04d}"
+
+
+def merge_parts(dir_name, table, n_shards, fmt='csv'):
+    # concatenates the part files in shard (= id) order - csv text is copied keeping a single header,
+    # parquet / arrow parts are re-written batch by batch into one file. Empty shards leave an empty
+    # csv (no header) or no parquet / arrow file at all, they are skipped
+    writer_cls, ext = WRITERS[fmt]
+    part_paths = [f'{dir_name}/{part_name(table, shard)}.{ext}' for shard in range(n_shards)]
+    part_paths = [part_path for part_path in part_paths if os.path.exists(part_path)]
+
+    if fmt == 'csv':
+        with open(f'{dir_name}/{table}.csv', 'w') as out:
+            header_written = False
+            for part_path in part_paths:
+                with open(part_path) as part:
+                    header = part.readline()
+                    if header and not header_written:
+                        out.write(header)
+                        header_written = True
+                    shutil.copyfileobj(part, out)
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        for part_path in part_paths:
+            part = pq.read_table(part_path) if fmt == 'parquet' else pa.ipc.open_file(part_path).read_all()
+            if writer is None and fmt == 'parquet':
+                writer = pq.ParquetWriter(f'{dir_name}/{table}.{ext}', part.schema, compression='zstd')
+            elif writer is None:
+                writer = pa.ipc.new_file(f'{dir_name}/{table}.{ext}', part.schema)
+            writer.write_table(part)
+        if writer is not None:
+            writer.close()
+
+    for part_path in part_paths:
+        os.remove(part_path)
+
+
+def merge_results(shard_results):
+    # shard results are the id / price columns dependents need (or None)
+    if shard_results[0] is None:
+        return None
+    return {key: np.concatenate([r[key] for r in shard_results]) for key in shard_results[0]}
+
+
+def generate_parallel(dir_name, master_seed, workers=None, shards=None, merge=True, scale_factor=None):
+    # shards: {table: number of shards} for the big tables from SHARDABLE, e.g. {'customers': 16}
+    workers = workers or os.cpu_count()
+    scale_factor = scale_factor or cr.SCALE_FACTOR
+    shards = shards or {}
+    results = {}
+    running = {}
+    shard_results = {}
+
+    for table in shards:
+        if table not in SHARDABLE:
+            raise ValueError(f"Table {table} can't be sharded")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while len(results) != len(DEPENDENCIES):
+            for table, deps in DEPENDENCIES.items():
+                if table in results or table in shard_results:
+                    continue
+                if all(d in results for d in deps):
+                    inputs = {d: results[d] for d in deps}
+                    n_shards = shards.get(table, 1)
+                    shard_results[table] = [None] * n_shards
+                    if table in shards:
+                        for shard in range(n_shards):
+                            running[pool.submit(run_table, table, master_seed, dir_name, inputs, shard, n_shards, scale_factor)] = (table, shard)
+                    else:
+                        running[pool.submit(run_table, table, master_seed, dir_name, inputs, scale_factor=scale_factor)] = (table, 0)
+                    print(f"Generating {table} started ({n_shards} shards)")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table, shard = running.pop(future)
+                shard_results[table][shard] = future.result()
+                if any(f_table == table for f_table, _ in running.values()):
+                    continue
+
+                if table in shards:
+                    if merge:
+                        merge_parts(dir_name, table, shards[table], cr.OUTPUT_FORMAT)
+                    results[table] = merge_results(shard_results.pop(table))
+                else:
+                    results[table] = shard_results.pop(table)[0]
+                print(f"Generating {table} complete")
+
+    print(f"Data generation completed and saved to {cr.OUTPUT_FORMAT} files.")
+    return results
+
+
+if __name__ == '__main__':
+
+    dir_name = 'data_full2'
+    if not os.path.exists(dir_name):
+        os.makedirs(dir_name)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sf', type=float, default=cr.SCALE_FACTOR, help='scale factor, 1 = 800k customers / 1M tickets')
+    generate_parallel(dir_name, cr.MASTER_SEED, shards=SHARDS, scale_factor=parser.parse_args().sf)
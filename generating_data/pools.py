@@ -0,0 +1,114 @@
+import json
+import os
+import numpy as np
+from faker import Faker, VERSION as FAKER_VERSION
+
+
+
+###############################
+# FAKER VALUE POOLS
+#
+# Faker is called POOL_SIZE times per field once, the pools are cached on disk, and the
+# create_* functions build whole columns by drawing indices into them with ctx.rng -
+# the same idea as get_n_fake_cities, for every Faker-backed field.
+
+POOL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'faker_pools')
+POOL_SIZE = 20000
+# fixed - the pools only depend on the locale, which entries a dataset uses comes from ctx.rng
+POOL_SEED = 2137
+
+POOL_FIELDS = {
+    'first_name': lambda faker: faker.first_name(),
+    'last_name': lambda faker: faker.last_name(),
+    'name': lambda faker: faker.name(),
+    'street_name': lambda faker: faker.street_name(),
+    'building_number': lambda faker: faker.building_number(),
+}
+
+# numerify placeholders in Faker's phone formats -> lowest digit
+PHONE_DIGITS = {'#': 0, '%': 1, '$': 2}
+DIGITS = np.array(list('0123456789'), dtype=object)
+
+_loaded = {}
+
+
+def pool_path(locale):
+    return os.path.join(POOL_DIR, f'{locale}-{POOL_SEED}-{POOL_SIZE}-faker{FAKER_VERSION}.json')
+
+
+def build_pools(locale):
+    faker = Faker(locale)
+    faker.seed_instance(POOL_SEED)
+    values = {field: [draw(faker) for _ in range(POOL_SIZE)] for field, draw in POOL_FIELDS.items()}
+    # the whole lorem word list (sentence() draws from it uniformly) and the phone formats themselves,
+    # digits are filled in per row
+    values['word'] = list(faker.get_words_list())
+    phone_provider = next(p for p in faker.providers if type(p).__module__.startswith('faker.providers.phone_number'))
+    values['phone_format'] = list(phone_provider.formats)
+    return values
+
+
+def load_pools(locale='en_US'):
+    # once per process, from the disk cache when it exists
+    if locale not in _loaded:
+        path = pool_path(locale)
+        if os.path.exists(path):
+            with open(path) as file:
+                values = json.load(file)
+        else:
+            values = build_pools(locale)
+            os.makedirs(POOL_DIR, exist_ok=True)
+            # parallel.py workers may build the same pools at once - write aside and rename
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as file:
+                json.dump(values, file)
+            os.replace(tmp, path)
+        _loaded[locale] = ValuePools(values)
+    return _loaded[locale]
+
+
+class ValuePools:
+
+    def __init__(self, values):
+        self.values = {field: np.array(pool, dtype=object) for field, pool in values.items()}
+        self.titled = np.array([w.title() for w in values['word']], dtype=object)
+        self.building_numbers = np.array([int(b) for b in values['building_number']])
+        self.phone_formats = values['phone_format']
+
+    def sample(self, field, n, rng):
+        pool = self.values[field]
+        return pool[rng.integers(0, len(pool), size=n)]
+
+    def phrases(self, n, nb_words, rng, variable_nb_words=True):
+        # faker.sentence(nb_words, variable_nb_words) without the trailing '.': 60-140% of nb_words
+        # words (at least 1), the first one title-cased
+        if n == 0:
+            return np.array([], dtype=object)
+        if variable_nb_words:
+            counts = np.maximum(nb_words * rng.integers(60, 141, size=n) // 100, 1)
+        else:
+            counts = np.full(n, nb_words)
+        words = self.values['word']
+        idx = rng.integers(0, len(words), size=(n, counts.max()))
+        out = self.titled[idx[:, 0]]
+        for j in range(1, idx.shape[1]):
+            out = np.where(counts > j, out + ' ' + words[idx[:, j]], out)
+        return out
+
+    def building_number_values(self, n, rng):
+        return self.building_numbers[rng.integers(0, len(self.building_numbers), size=n)]
+
+    def phone_numbers(self, n, rng):
+        # faker.phone_number(): a random format, every placeholder replaced by a random digit
+        formats = rng.integers(0, len(self.phone_formats), size=n)
+        out = np.empty(n, dtype=object)
+        for f, fmt in enumerate(self.phone_formats):
+            rows = np.flatnonzero(formats == f)
+            number = np.full(len(rows), '', dtype=object)
+            for char in fmt:
+                if char in PHONE_DIGITS:
+                    number = number + DIGITS[rng.integers(PHONE_DIGITS[char], 10, size=len(rows))]
+                else:
+                    number = number + char
+            out[rows] = number
+        return out
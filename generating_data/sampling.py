@@ -0,0 +1,59 @@
+import numpy as np
+
+
+
+###############################
+# WEIGHTED SAMPLING
+#
+# Walker's alias method - the table is built once per distribution, after that every draw is one
+# uniform bucket and one biased coin, no cumsum / validation of the weights per call.
+
+
+class AliasSampler:
+
+    def __init__(self, values, weights):
+        self.values = list(values)
+        weights = np.asarray(weights, dtype=np.float64)
+        if len(weights) != len(self.values) or len(weights) == 0:
+            raise ValueError("values and weights must be non-empty and of the same length")
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("weights must be non-negative with a positive sum")
+
+        k = len(weights)
+        scaled = weights * k / weights.sum()
+        prob = np.ones(k)
+        alias = np.arange(k)
+        small = [i for i in range(k) if scaled[i] < 1.0]
+        large = [i for i in range(k) if scaled[i] >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # whatever is left is 1 up to rounding and keeps prob = 1
+
+        self.prob = prob
+        self.alias = alias
+        # numbers / bools as numpy columns, anything else (enums, strings) as objects
+        values = np.asarray(self.values)
+        self.value_array = values if values.dtype.kind in 'biuf' else np.array(self.values, dtype=object)
+        # plain lists for the one-at-a-time path, indexing numpy arrays per draw is slower
+        self._prob = prob.tolist()
+        self._alias = alias.tolist()
+
+    def __len__(self):
+        return len(self.values)
+
+    def sample_index(self, rng, n):
+        # n indices into values at once, rng is a numpy Generator (ctx.rng)
+        idx = rng.integers(0, len(self.values), size=n)
+        return np.where(rng.random(n) < self.prob[idx], idx, self.alias[idx])
+
+    def sample(self, rng, n):
+        return self.value_array[self.sample_index(rng, n)]
+
+    def draw(self, random):
+        # one value, random is a random.Random (ctx.random)
+        i = int(random.random() * len(self.values))
+        return self.values[i] if random.random() < self._prob[i] else self.values[self._alias[i]]
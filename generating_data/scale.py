@@ -0,0 +1,87 @@
+import math
+
+
+
+###############################
+# SCALE FACTOR
+#
+# One number sizes the whole dataset, TPC style: SF = 1 is the original dataset
+# (800k customers, 1M tickets), every other table follows through fixed ratios.
+# Shared by create_records.py (what to generate) and lab6 (what to expect in the DB).
+
+SCALE_FACTOR = 1.0
+MIN_SCALE_FACTOR = 0.01
+MAX_SCALE_FACTOR = 100
+
+# rows per SF = 1
+CUSTOMERS_PER_SF = 800000
+PERFORMERS_PER_SF = 17000
+ORGANIZERS_PER_SF = 800
+CITIES_PER_SF = 500
+
+# ratios between tables
+PURCHASES_PER_CUSTOMER = 950000 / 800000
+TICKETS_PER_PURCHASE = 1000000 / 950000
+VENUES_PER_CITY = 2100 / 500        # ~4 venues per city
+EVENTS_PER_VENUE = 85000 / 2100     # ~40 events per venue in a year
+
+# derived tables - (mean, variance) of the per-parent draws in create_records.py
+SUBEVENTS_PER_EVENT = (1.31, 0.3539)    # 1..4 with p = [0.75, 0.2, 0.04, 0.01]
+STAGES_PER_VENUE = (1.22, 0.3916)       # 1..5 with weights [0.85, 0.11, 0.02, 0.01, 0.01]
+SEATS_PER_STAGE = (50, 546.67)          # range(10, randint(20, 100)) -> 10..90 seats
+
+# how far below its mean a derived table may fall before lab6 calls it too small
+DERIVED_SIGMAS = 4
+
+
+def check_scale_factor(sf):
+    if not MIN_SCALE_FACTOR <= sf <= MAX_SCALE_FACTOR:
+        raise ValueError(f"Scale factor {sf} outside {MIN_SCALE_FACTOR}..{MAX_SCALE_FACTOR}")
+
+
+def scaled(n):
+    return max(1, round(n))
+
+
+def table_sizes(sf=SCALE_FACTOR):
+    # rows create_records.py generates directly
+    check_scale_factor(sf)
+    customers = scaled(CUSTOMERS_PER_SF * sf)
+    purchases = scaled(customers * PURCHASES_PER_CUSTOMER)
+    cities = scaled(CITIES_PER_SF * sf)
+    venues = scaled(cities * VENUES_PER_CITY)
+    return {
+        'organizers': scaled(ORGANIZERS_PER_SF * sf),
+        'performers': scaled(PERFORMERS_PER_SF * sf),
+        'customers': customers,
+        'cities': cities,
+        'venues': venues,
+        'events': scaled(venues * EVENTS_PER_VENUE),
+        'purchases': purchases,
+        'tickets': scaled(purchases * TICKETS_PER_PURCHASE),
+    }
+
+
+def expected_counts(sf=SCALE_FACTOR):
+    # {DB table: (expected rows, standard deviation)} - subevents, stages and seats are random
+    sizes = table_sizes(sf)
+    stages = sizes['venues'] * STAGES_PER_VENUE[0]
+    stages_var = sizes['venues'] * STAGES_PER_VENUE[1]
+    seats_var = stages * SEATS_PER_STAGE[1] + stages_var * SEATS_PER_STAGE[0] ** 2
+    return {
+        "Ticket": (sizes['tickets'], 0),
+        "Purchase": (sizes['purchases'], 0),
+        "Event": (sizes['events'], 0),
+        "Organizer": (sizes['organizers'], 0),
+        "Customer": (sizes['customers'], 0),
+        "Venue": (sizes['venues'], 0),
+        "Performer": (sizes['performers'], 0),
+        "Subevent": (sizes['events'] * SUBEVENTS_PER_EVENT[0], math.sqrt(sizes['events'] * SUBEVENTS_PER_EVENT[1])),
+        "Address": (sizes['venues'], 0),
+        "Stage": (stages, math.sqrt(stages_var)),
+        "Seat": (stages * SEATS_PER_STAGE[0], math.sqrt(seats_var)),
+    }
+
+
+def minimum_counts(sf=SCALE_FACTOR, sigmas=DERIVED_SIGMAS):
+    return {table: max(1, math.floor(mean - sigmas * sd)) for table, (mean, sd) in expected_counts(sf).items()}
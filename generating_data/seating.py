@@ -0,0 +1,147 @@
+import numpy as np
+from tables import id_column
+
+
+
+###############################
+# SEAT ALLOCATION
+#
+# Tickets get a seat at a stage of the venue hosting their event (the venue of its subevents), and
+# no seat is sold twice for the same event, nor more tickets than the venue's capacity (a venue may
+# have more seat rows than that). One flat bool array holds a bit per (event, seat at
+# the event's venue): event e owns taken[base[e]:base[e] + size[e]], and bit i of it is seat
+# seat_ids[seat_start[e] + i]. Seats are drawn by rejection - a random slot of the event, redrawn
+# if it is already taken - so a draw is O(1) expected while the event isn't nearly full; what is
+# still left after RETRY_ROUNDS picks among the free bits of its event directly, and tickets of
+# events that sold out meanwhile move to other events.
+
+RETRY_ROUNDS = 8
+
+
+class SeatsExhausted(ValueError):
+    # every sellable event is sold out
+    pass
+
+
+def lookup(keys, key_ids, values, missing=-1):
+    # values[i] for the i with key_ids[i] == key, for every key; `missing` where there is none
+    key_ids = np.asarray(key_ids)
+    keys = np.asarray(keys)
+    if not len(key_ids):
+        return np.full(len(keys), missing)
+    order = np.argsort(key_ids, kind='stable')
+    pos = np.minimum(np.searchsorted(key_ids[order], keys), len(key_ids) - 1)
+    found = key_ids[order][pos] == keys
+    return np.where(found, np.asarray(values)[order][pos], missing)
+
+
+class SeatAllocator:
+
+    def __init__(self, event_ids, event_venues, seat_ids, seat_venues, event_capacities=None, sellable=None):
+        # event_capacities: most tickets per event (its venue_capacity), by default every seat of the venue
+        # sellable: bool per event, e.g. the events one tickets shard of parallel.py sells
+        self.event_ids = np.asarray(event_ids)
+        event_venues = np.asarray(event_venues)
+        order = np.argsort(seat_venues, kind='stable')
+        self.seat_ids = np.asarray(seat_ids)[order]
+        venues, starts, counts = np.unique(np.asarray(seat_venues)[order], return_index=True, return_counts=True)
+
+        self.seat_start = lookup(event_venues, venues, starts, missing=0)
+        self.size = lookup(event_venues, venues, counts, missing=0)
+        self.base = np.concatenate([[0], np.cumsum(self.size)[:-1]]).astype(np.int64)
+        self.taken = np.zeros(int(self.size.sum()), dtype=bool)
+        # tickets each event can still sell
+        self.free = self.size.copy() if event_capacities is None else np.minimum(self.size, event_capacities)
+        self.sellable = np.ones(len(self.event_ids), dtype=bool) if sellable is None else np.asarray(sellable)
+
+    @classmethod
+    def from_tables(cls, events, subevents, venues, stages, seats, sellable=None):
+        # record lists or {column: array} mappings (the kept / read-back columns of append.py)
+        event_ids = id_column(events, 'event_id')
+        event_venues = lookup(event_ids, id_column(subevents, 'event_id'), id_column(subevents, 'venue_id'))
+        event_capacities = lookup(event_venues, id_column(venues, 'venue_id'), id_column(venues, 'venue_capacity'), missing=0)
+        seat_venues = lookup(id_column(seats, 'stage_id'), id_column(stages, 'stage_id'), id_column(stages, 'venue_id'))
+        return cls(event_ids, event_venues, id_column(seats, 'seat_id'), seat_venues, event_capacities, sellable)
+
+    def mark_taken(self, event_ids, seat_ids):
+        # seats already sold (tickets of an existing dataset); tickets not matching the allocator's
+        # events or their venues are skipped
+        events = lookup(event_ids, self.event_ids, np.arange(len(self.event_ids)))
+        positions = lookup(seat_ids, self.seat_ids, np.arange(len(self.seat_ids)))
+        ok = (events >= 0) & (positions >= 0)
+        events, offsets = events[ok], positions[ok] - self.seat_start[events[ok]]
+        ok = (offsets >= 0) & (offsets < self.size[events])
+        slots, first = np.unique(self.base[events[ok]] + offsets[ok], return_index=True)
+        new = ~self.taken[slots]
+        self.take(events[ok][first][new], slots[new])
+
+    def open_events(self):
+        return np.flatnonzero((self.free > 0) & self.sellable)
+
+    def allocate(self, n, rng):
+        # n (event id, seat id) pairs, events uniform over the ones with free seats
+        open_events = self.open_events()
+        if n and not len(open_events):
+            raise SeatsExhausted("No free seats left in any sellable event")
+        events = open_events[rng.integers(0, len(open_events), size=n)]
+        slots = np.full(n, -1, dtype=np.int64)
+
+        pending = np.arange(n)
+        while len(pending):
+            pending = self.draw_slots(events, slots, pending, rng)
+            if len(pending):
+                pending = self.take_free(events, slots, pending, rng)
+            if len(pending):
+                # their events sold out - the tickets go to other events
+                open_events = self.open_events()
+                if not len(open_events):
+                    raise SeatsExhausted("No free seats left in any sellable event")
+                events[pending] = open_events[rng.integers(0, len(open_events), size=len(pending))]
+
+        return self.event_ids[events], self.seat_ids[self.seat_start[events] + slots - self.base[events]]
+
+    def draw_slots(self, events, slots, pending, rng):
+        # rejection rounds, returns the tickets still without a seat
+        for _ in range(RETRY_ROUNDS):
+            if not len(pending):
+                break
+            e = events[pending]
+            slot = self.base[e] + (rng.random(len(pending)) * self.size[e]).astype(np.int64)
+            # the first request for a free slot wins it, the rest draw again
+            won = np.zeros(len(pending), dtype=bool)
+            won[np.unique(slot, return_index=True)[1]] = True
+            won &= ~self.taken[slot]
+            # and only as many as the event can still sell
+            winners = np.flatnonzero(won)
+            won[winners[~self.within_free(e[winners])]] = False
+            self.take(e[won], slot[won])
+            slots[pending[won]] = slot[won]
+            pending = pending[~won]
+        return pending
+
+    def take_free(self, events, slots, pending, rng):
+        # (nearly) full events - pick among their free bits directly, returns the tickets of sold out events
+        pending = pending[np.argsort(events[pending], kind='stable')]
+        left = []
+        for group in np.split(pending, np.flatnonzero(np.diff(events[pending])) + 1):
+            event = events[group[0]]
+            free = self.base[event] + np.flatnonzero(~self.taken[self.base[event]:self.base[event] + self.size[event]])
+            k = max(min(len(group), len(free), self.free[event]), 0)
+            chosen = rng.choice(free, size=k, replace=False)
+            self.take(np.full(k, event), chosen)
+            slots[group[:k]] = chosen
+            left.append(group[k:])
+        return np.concatenate(left)
+
+    def within_free(self, events):
+        # True for the first free[e] tickets of every event e, in order
+        order = np.argsort(events, kind='stable')
+        sorted_events = events[order]
+        rank = np.arange(len(events)) - np.searchsorted(sorted_events, sorted_events)
+        ok = np.empty(len(events), dtype=bool)
+        ok[order] = rank < self.free[sorted_events]
+        return ok
+
+    def take(self, events, slots):
+        self.taken[slots] = True
+        np.subtract.at(self.free, events, 1)
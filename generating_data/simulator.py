@@ -0,0 +1,157 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pg8000
+from append import append_context, read_db_state, state_allocator
+from create_records import create_purchases_batched, create_tickets_batched
+from distributions import HOLIDAYS, HOLIDAY_SHARE, WEEKDAY_HOURS, WEEKDAY_HOUR_WEIGHTS, WEEKEND_HOURS
+from loader import CopyLoader, DB_SETTINGS, DB_TABLES
+from scale import TICKETS_PER_PURCHASE
+from seating import SeatsExhausted
+
+RATE = 50.0             # purchases per wall-clock second on an average day
+SPEEDUP = 60.0          # simulated seconds per wall-clock second
+TICK = 1.0              # wall-clock seconds between batches
+BATCH_SIZE = 1000       # purchases per transaction, their tickets go in the same one
+DURATION = 60.0         # wall-clock seconds
+REPORT_EVERY = 10.0
+START = "2024-12-20T00:00:00"
+# traffic outside the purchase hours of generate_purchase_date (which has none at night)
+OFF_PEAK_SHARE = 0.05
+# a holiday gets HOLIDAY_SHARE of the year's purchases split over len(HOLIDAYS) days
+HOLIDAY_BOOST = (HOLIDAY_SHARE / len(HOLIDAYS)) / ((1 - HOLIDAY_SHARE) / (365 - len(HOLIDAYS)))
+
+
+
+###############################
+# TRAFFIC SHAPE
+#
+# The same shape as the static dataset: weekday evenings weighted like WEEKDAY_HOUR_WEIGHTS,
+# weekends flat over WEEKEND_HOURS, holidays HOLIDAY_BOOST times busier than a normal day.
+
+
+def hourly_intensity(hours, weights):
+    # 24 multipliers of the average rate, mean 1 over the day
+    profile = np.full(24, OFF_PEAK_SHARE)
+    for hour, weight in zip(hours, weights):
+        profile[hour] += 24 * (1 - OFF_PEAK_SHARE) * weight / sum(weights)
+    return profile
+
+
+WEEKDAY_INTENSITY = hourly_intensity(WEEKDAY_HOURS, WEEKDAY_HOUR_WEIGHTS)
+WEEKEND_INTENSITY = hourly_intensity(WEEKEND_HOURS, [1] * len(WEEKEND_HOURS))
+
+
+def intensity(moment: datetime):
+    profile = WEEKDAY_INTENSITY if moment.weekday() < 5 else WEEKEND_INTENSITY
+    boost = HOLIDAY_BOOST if (moment.month, moment.day) in HOLIDAYS else 1.0
+    return profile[moment.hour] * boost
+
+
+###############################
+# SIMULATOR
+
+
+class TrafficStats:
+
+    def __init__(self):
+        self.purchases = 0
+        self.tickets = 0
+        self.transactions = 0
+        self.commit_latencies = []
+        self.transaction_latencies = []
+        self.lag = 0.0      # how far the batches fell behind the wall clock, seconds
+
+    def report(self, elapsed, sim_time):
+        commits = np.array(self.commit_latencies or [float("nan")]) * 1000
+        transactions = np.array(self.transaction_latencies or [float("nan")]) * 1000
+        rows = self.purchases + self.tickets
+        return (f"{elapsed:7.1f} s  sim {sim_time:%Y-%m-%d %H:%M}  purchases: {self.purchases}  tickets: {self.tickets}  "
+                f"rows/s: {rows / elapsed:.0f}  tx/s: {self.transactions / elapsed:.1f}  "
+                f"commit p50/p95/p99: {np.percentile(commits, 50):.1f}/{np.percentile(commits, 95):.1f}/{np.percentile(commits, 99):.1f} ms  "
+                f"tx p95: {np.percentile(transactions, 95):.1f} ms  lag: {self.lag:.1f} s")
+
+
+def write_batch(loader, purchases, tickets, stats):
+    # one transaction: purchases first, then the tickets referencing them
+    start = time.perf_counter()
+    loader.copy_frame(DB_TABLES['purchases'], purchases.to_frame())
+    loader.copy_frame(DB_TABLES['tickets'], tickets.to_frame())
+    commit_start = time.perf_counter()
+    loader.conn.commit()
+    end = time.perf_counter()
+    stats.commit_latencies.append(end - commit_start)
+    stats.transaction_latencies.append(end - start)
+    stats.transactions += 1
+    stats.purchases += len(purchases)
+    stats.tickets += len(tickets)
+
+
+def simulate(db_settings=DB_SETTINGS, rate=RATE, speedup=SPEEDUP, tick=TICK, batch_size=BATCH_SIZE, duration=DURATION,
+             start=START, seed=None, report_every=REPORT_EVERY):
+    # every tick covers tick * speedup simulated seconds: Poisson(rate * tick * intensity) purchases
+    # with dates spread over that span, TICKETS_PER_PURCHASE tickets each on average
+    conn = pg8000.connect(**db_settings)
+    stats = TrafficStats()
+    try:
+        loader = CopyLoader(conn)
+        state = read_db_state(loader.cursor, DB_TABLES)
+        ctx = append_context(state, seed)
+        # stays open for the whole run, so the stream never sells a seat twice either
+        allocator = state_allocator(state)
+        print(f"Simulating from {start}: {rate} purchases/s on average, x{speedup} speed, "
+              f"{len(state['customers']['customer_id'])} customers, {len(state['events']['event_id'])} events")
+
+        sim_time = datetime.fromisoformat(start)
+        span = timedelta(seconds=tick * speedup)
+        began = time.perf_counter()
+        next_tick = next_report = began
+        try:
+            while time.perf_counter() - began < duration:
+                n = int(ctx.rng.poisson(rate * tick * intensity(sim_time + span / 2)))
+                offsets = np.sort(ctx.rng.integers(0, int(span.total_seconds()), size=n))
+                dates = np.datetime64(sim_time, 's') + offsets.astype('timedelta64[s]')
+                for first in range(0, n, batch_size):
+                    rows = min(batch_size, n - first)
+                    purchases = create_purchases_batched(rows, state['customers'], ctx, dates[first:first + rows])
+                    n_tickets = int(ctx.rng.poisson(rows * TICKETS_PER_PURCHASE))
+                    tickets = create_tickets_batched(n_tickets, purchases, allocator, ctx)
+                    write_batch(loader, purchases, tickets, stats)
+                sim_time += span
+
+                now = time.perf_counter()
+                if now >= next_report:
+                    print(stats.report(now - began, sim_time))
+                    next_report += report_every
+                next_tick += tick
+                stats.lag = max(0.0, now - next_tick)
+                if next_tick > now:
+                    time.sleep(next_tick - now)
+        except KeyboardInterrupt:
+            pass
+        except SeatsExhausted as e:
+            # a long run sells out every event - the batch that hit it is not written, the rest is reported
+            print(f"Stopped at sim {sim_time:%Y-%m-%d %H:%M}: {e}")
+        finally:
+            conn.rollback()
+        summary = stats.report(time.perf_counter() - began, sim_time)
+        print(summary)
+        return summary
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rate', type=float, default=RATE, help='purchases per second on an average day')
+    parser.add_argument('--speedup', type=float, default=SPEEDUP, help='simulated seconds per second')
+    parser.add_argument('--tick', type=float, default=TICK)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='purchases per transaction')
+    parser.add_argument('--duration', type=float, default=DURATION, help='seconds, Ctrl-C stops earlier')
+    parser.add_argument('--start', default=START, help='simulated start time, e.g. 2024-12-24T17:00:00')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    simulate(rate=args.rate, speedup=args.speedup, tick=args.tick, batch_size=args.batch_size, duration=args.duration,
+             start=args.start, seed=args.seed)
@@ -1,6 +1,10 @@
 import itertools
+import operator
+from enum import Enum
 from enums import EventStatus, PerformerType, SeatStatus, SubeventType, TicketType, VenueType
 from datetime import datetime, date
+import numpy as np
+import pandas as pd
 
 
 
@@ -8,7 +12,38 @@ from datetime import datetime, date
 # TABLES
 
 
-class Ticket:
+def reset_ids(table, start=0):
+    # id sequences are per class - restart them so a table gets the same ids whichever process builds it
+    table.id_iter = itertools.count(start)
+
+
+def id_column(rows, column):
+    # record objects, or a {column: array} mapping like the kept columns of write_chunks (append.py)
+    if isinstance(rows, dict):
+        return np.asarray(rows[column])
+    return np.array([getattr(r, column) for r in rows])
+
+
+def reserve_ids(table, n):
+    # hands out n consecutive ids from the table's id_iter at once (for batched generation)
+    start = next(table.id_iter)
+    table.id_iter = itertools.count(start + n)
+    return np.arange(start, start + n)
+
+
+class Record:
+    # base of the per-row objects: __slots__ instead of a __dict__ per row, and no serialization of
+    # their own - rows only leave as columns through the builders below (TableColumns.from_records)
+    __slots__ = ()
+    columnar = None     # the table's TableColumns class, bound at the bottom of this module
+    
+    def to_dict(self):
+        # one row through the same column path as the csv - for debugging, not for bulk export
+        return {column: values[0] for column, values in self.columnar.from_records([self]).to_columns().items()}
+
+
+class Ticket(Record):
+    __slots__ = ('ticket_id', 'purchase_id', 'event_id', 'ticket_type', 'ticket_seat_id', 'ticket_price')
     
     id_iter = itertools.count()
     
@@ -19,19 +54,10 @@ class Ticket:
         self.ticket_type = ticket_type
         self.ticket_seat_id = ticket_seat_id
         self.ticket_price = ticket_price
-        
-    def to_dict(self):
-        return {
-            'ticket_id': self.ticket_id,
-            'purchase_id': self.purchase_id,
-            'event_id': self.event_id,
-            'ticket_type': self.ticket_type.name.lower(),
-            'ticket_seat_id': self.ticket_seat_id,
-            'ticket_price': self.ticket_price
-        }
 
 
-class Purchase:
+class Purchase(Record):
+    __slots__ = ('purchase_id', 'customer_id', 'purchase_date', 'purchase_total_price')
     
     id_iter = itertools.count()
     
@@ -40,17 +66,10 @@ class Purchase:
         self.customer_id = customer_id
         self.purchase_date = purchase_date
         self.purchase_total_price = purchase_total_price
-        
-    def to_dict(self):
-        return {
-            'purchase_id': self.purchase_id,
-            'customer_id': self.customer_id,
-            'purchase_date': self.purchase_date.isoformat(),
-            'purchase_total_price': self.purchase_total_price
-        }
-        
-        
-class Customer:
+
+
+class Customer(Record):
+    __slots__ = ('customer_id', 'customer_name', 'customer_surname', 'customer_email', 'customer_phone_number', 'customer_birth_date')
     id_iter = itertools.count()
     
     def __init__(self, customer_name: str, custormer_surname: str, customer_email: str, customer_phone_number: str, customer_birth_date: date):
@@ -60,19 +79,11 @@ class Customer:
         self.customer_email = customer_email
         self.customer_phone_number = customer_phone_number
         self.customer_birth_date = customer_birth_date
-        
-    def to_dict(self):
-        return {
-            'customer_id': self.customer_id,
-            'customer_name': self.customer_name,
-            'customer_surname': self.customer_surname,
-            'customer_email': self.customer_email,
-            'customer_phone_number': self.customer_phone_number,
-            'customer_birth_date': self.customer_birth_date.date()
-        }
+
 
 # N_OF_SUBEVENTS and SIZE ADDED AS A SUBSIDIARY ATR - DO NOT INCLUDE IN DB   
-class Event:
+class Event(Record):
+    __slots__ = ('event_id', 'organizer_id', 'event_name', 'event_start_date', 'event_end_date', 'event_description', 'event_status', 'event_n_of_subevents', 'event_size')
     id_iter = itertools.count()
     
     def __init__(self, organizer_id: int, event_name: str, event_start_date: datetime, event_end_date: datetime, event_description: str, event_status: EventStatus, n_of_subevents: int, event_size: str ):
@@ -92,36 +103,20 @@ class Event:
         
         else:
             return atr
-        
-    def to_dict(self):
-        return {
-            'event_id': self.event_id,
-            'organizer_id': self.organizer_id,
-            'event_name': self.event_name[:40],
-            'event_start_date': self.event_start_date.isoformat(),
-            'event_end_date': self.event_end_date.isoformat(),
-            'event_description': self.event_description,
-            'event_status': self.event_status.name.lower() 
-        }
- 
-        
-class Organizer:
+
+
+class Organizer(Record):
+    __slots__ = ('organizer_id', 'organizer_name', 'organizer_email')
     id_iter = itertools.count()
     
     def __init__(self, organizer_name: str, organizer_email: str):
         self.organizer_id = next(self.id_iter)
         self.organizer_name = organizer_name
         self.organizer_email = organizer_email
-    
-    def to_dict(self):
-        return {
-            'organizer_id': self.organizer_id,
-            'organizer_name': self.organizer_name[:49],
-            'organizer_email': self.organizer_email
-        }
-       
-        
-class Subevent:
+
+
+class Subevent(Record):
+    __slots__ = ('subevent_id', 'event_id', 'subevent_type', 'venue_id', 'performer_id', 'subevent_start_date', 'subevent_end_date')
     id_iter = itertools.count()
     
     def __init__(self, event_id: int, subevent_type: SubeventType, venue_id: int, performer_id: int, subevent_start_date: datetime, subevent_end_date: datetime):
@@ -132,21 +127,11 @@ class Subevent:
         self.performer_id = performer_id
         self.subevent_start_date = subevent_start_date
         self.subevent_end_date = subevent_end_date
-    
-    def to_dict(self):
-        return {
-            'subevent_id': self.subevent_id,
-            'event_id': self.event_id,
-            'subevent_type': self.subevent_type.name.lower(), 
-            'venue_id': self.venue_id,
-            'performer_id': self.performer_id,
-            'subevent_start_date': self.subevent_start_date.isoformat(),
-            'subevent_end_date': self.subevent_end_date.isoformat()
-        }
-   
-      
+
+
 # POPULARITY ADDED AS A SUBSIDIARY ATR - DO NOT INCLUDE IN DB     
-class Performer:
+class Performer(Record):
+    __slots__ = ('performer_id', 'performer_name', 'performer_type', 'is_a_band', 'popularity')
     id_iter = itertools.count()
     
     def __init__(self, performer_name: str, performer_type: PerformerType, is_a_band: bool, popularity: int):
@@ -155,18 +140,11 @@ class Performer:
         self.performer_type = performer_type
         self.is_a_band = is_a_band
         self.popularity = popularity
-    
-    def to_dict(self):
-        return {
-            'performer_id': self.performer_id,
-            'performer_name': self.performer_name[:49],
-            'performer_type': self.performer_type.name.title(), 
-            'is_a_band': self.is_a_band
-        }
 
 
 # SIZE ADDED AS A SUBSIDIARY ATR - DO NOT INCLUDE IN DB  
-class Venue:
+class Venue(Record):
+    __slots__ = ('venue_id', 'venue_name', 'venue_type', 'venue_address_id', 'venue_capacity', 'venue_size')
     id_iter = itertools.count()
     
     def __init__(self, venue_name: str, venue_type: VenueType ,venue_address_id: int, venue_capacity: int, venue_size: str):
@@ -176,18 +154,11 @@ class Venue:
         self.venue_address_id = venue_address_id
         self.venue_capacity = venue_capacity
         self.venue_size = venue_size
-        
-    def to_dict(self):
-        return {
-            'venue_id': self.venue_id,
-            'venue_name': self.venue_name[:49],
-            'venue_address_id': self.venue_address_id,
-            'venue_capacity': self.venue_capacity,
-            'venue_type': self.venue_type.name.lower(),
-        }
-        
+
+
 # te rozmiary to tak średnio        
-class Address:
+class Address(Record):
+    __slots__ = ('address_id', 'address_country', 'address_city', 'address_street', 'address_postal_code', 'address_number')
     id_iter = itertools.count()
     
     def __init__(self, adr_country: str, adr_city: str, adr_street: str, adr_pcode: str, adr_nr: str):
@@ -203,19 +174,10 @@ class Address:
             raise ValueError(f"Atr cant be that long")
         else:
             return atr
-    
-    def to_dict(self):
-        return {
-            'address_id': self.address_id,
-            'address_country': self.address_country[:49],
-            'address_city': self.address_city[:57],
-            'address_street': self.address_street[:59],
-            'address_postal_code': self.address_postal_code[:8],
-            'address_number': str(self.address_number)[:4]
-        }
-  
-        
-class Stage:
+
+
+class Stage(Record):
+    __slots__ = ('stage_id', 'stage_name', 'venue_id')
     id_iter = itertools.count()
     
     def __init__(self, stage_name: str, venue_id: int):
@@ -228,16 +190,10 @@ class Stage:
             raise ValueError(f"Atr cant be that long")
         else:
             return atr
-    
-    def to_dict(self):
-        return {
-            'stage_id': self.stage_id,
-            'stage_name': self.stage_name,
-            'venue_id': self.venue_id
-        }
-        
 
-class Seat:
+
+class Seat(Record):
+    __slots__ = ('seat_id', 'stage_id', 'seat_name', 'seat_status', 'seat_sector')
     id_iter = itertools.count()
     
     def __init__(self, stage_id: int, seat_name: str, seat_status: SeatStatus, seat_sector: str):
@@ -246,12 +202,196 @@ class Seat:
         self.seat_name = seat_name
         self.seat_status = seat_status
         self.seat_sector = seat_sector
+
+
+###############################
+# COLUMNAR BUILDERS
+#
+# One builder per table keeps the rows as columns (lists / numpy arrays) instead of one object
+# per row. The cleanup rules (truncation, lowercased enums, isoformat) are applied
+# once per column in to_columns, and the DataFrame is built straight from those columns.
+
+
+def lower_enum(enum_cls):
+    return enum_names([item.name.lower() for item in enum_cls])
+
+
+def title_enum(enum_cls):
+    return enum_names([item.name.title() for item in enum_cls])
+
+
+def enum_names(categories):
+    # enum columns hold the enum values (1..n), categories[value - 1] is what lands in the csv
+    names = np.array([''] + categories, dtype=object)
+    def transform(col):
+        return names[np.asarray(col, dtype=np.int64)]
+    transform.categories = categories
+    return transform
+
+
+def truncate(max_length):
+    return lambda col: pd.Series(col, dtype=object).astype(str).str.slice(0, max_length)
+
+
+def isoformat(col):
+    return np.datetime_as_string(np.asarray(col, dtype='datetime64[s]'), unit='s')
+
+
+def as_date(col):
+    return np.asarray(col, dtype='datetime64[D]')
+
+
+class TableColumns:
+    # record class handing out the ids, (column, transform) pairs and columns named differently than the record atr
+    table = None
+    schema = ()
+    renamed = {}
     
-    def to_dict(self):
-        return {
-            'seat_id': self.seat_id,
-            'stage_id': self.stage_id,
-            'seat_name': self.seat_name[:5],
-            'seat_status': self.seat_status.name.lower(),
-            'sector': self.seat_sector
-        }
\ No newline at end of file
+    def __init__(self):
+        self.columns = {column: [] for column, _ in self.schema}
+        self.id_column = self.schema[0][0]
+    
+    def __len__(self):
+        return len(self.columns[self.id_column])
+    
+    def __getitem__(self, column):
+        return self.columns[column]
+    
+    def add_row(self, **values):
+        values[self.id_column] = next(self.table.id_iter)
+        for column, _ in self.schema:
+            value = values[column]
+            col = self.columns[column]
+            if isinstance(col, np.ndarray):
+                col = self.columns[column] = col.tolist()
+            col.append(value.value if isinstance(value, Enum) else value)
+        return values[self.id_column]
+    
+    def extend(self, **columns):
+        n = len(next(iter(columns.values())))
+        columns[self.id_column] = reserve_ids(self.table, n)
+        for column, _ in self.schema:
+            values = columns[column]
+            if len(values) and isinstance(values[0], Enum):
+                values = np.array([v.value for v in values], dtype=np.int8)
+            col = self.columns[column]
+            if len(col) == 0:
+                self.columns[column] = values
+            elif isinstance(col, np.ndarray) and isinstance(values, np.ndarray):
+                self.columns[column] = np.concatenate([col, values])
+            else:
+                self.columns[column] = list(col) + list(values)
+        return columns[self.id_column]
+    
+    @classmethod
+    def record_getter(cls):
+        # one attrgetter for the whole row (built once per table) - record -> tuple in schema order
+        if '_record_getter' not in cls.__dict__:
+            cls._record_getter = operator.attrgetter(*[cls.renamed.get(column, column) for column, _ in cls.schema])
+        return cls._record_getter
+    
+    @classmethod
+    def from_records(cls, records):
+        # for tables still generated as objects - a single pass over the records, transposed into
+        # columns; attributes outside the schema (popularity, event_size, ...) are never read
+        builder = cls()
+        rows = list(map(cls.record_getter(), records))
+        if not rows:
+            return builder
+        for (column, _), values in zip(cls.schema, zip(*rows)):
+            if isinstance(values[0], Enum):
+                values = np.array([v.value for v in values], dtype=np.int8)
+            builder.columns[column] = list(values) if isinstance(values, tuple) else values
+        return builder
+    
+    def to_columns(self):
+        return {column: transform(self.columns[column]) if transform else self.columns[column] for column, transform in self.schema}
+    
+    def to_frame(self):
+        return pd.DataFrame(self.to_columns(), copy=False)
+    
+    def to_arrow(self):
+        # native types instead of the csv strings: enums dictionary-encoded, dates as timestamps
+        import pyarrow as pa
+        arrays = []
+        for column, transform in self.schema:
+            values = self.columns[column]
+            if hasattr(transform, 'categories'):
+                codes = pa.array(np.asarray(values, dtype=np.int8) - 1)
+                arrays.append(pa.DictionaryArray.from_arrays(codes, pa.array(transform.categories)))
+            elif transform is isoformat:
+                arrays.append(pa.array(np.asarray(values, dtype='datetime64[s]')))
+            elif transform is as_date:
+                arrays.append(pa.array(np.asarray(values, dtype='datetime64[D]')))
+            elif transform:
+                arrays.append(pa.array(transform(values)))
+            else:
+                arrays.append(pa.array(values))
+        return pa.Table.from_arrays(arrays, names=[column for column, _ in self.schema])
+
+
+class TicketColumns(TableColumns):
+    table = Ticket
+    schema = (('ticket_id', None), ('purchase_id', None), ('event_id', None), ('ticket_type', lower_enum(TicketType)),
+              ('ticket_seat_id', None), ('ticket_price', None))
+
+
+class PurchaseColumns(TableColumns):
+    table = Purchase
+    schema = (('purchase_id', None), ('customer_id', None), ('purchase_date', isoformat), ('purchase_total_price', None))
+
+
+class CustomerColumns(TableColumns):
+    table = Customer
+    schema = (('customer_id', None), ('customer_name', None), ('customer_surname', None), ('customer_email', None),
+              ('customer_phone_number', None), ('customer_birth_date', as_date))
+
+
+class EventColumns(TableColumns):
+    table = Event
+    schema = (('event_id', None), ('organizer_id', None), ('event_name', truncate(40)), ('event_start_date', isoformat),
+              ('event_end_date', isoformat), ('event_description', None), ('event_status', lower_enum(EventStatus)))
+
+
+class OrganizerColumns(TableColumns):
+    table = Organizer
+    schema = (('organizer_id', None), ('organizer_name', truncate(49)), ('organizer_email', None))
+
+
+class SubeventColumns(TableColumns):
+    table = Subevent
+    schema = (('subevent_id', None), ('event_id', None), ('subevent_type', lower_enum(SubeventType)), ('venue_id', None),
+              ('performer_id', None), ('subevent_start_date', isoformat), ('subevent_end_date', isoformat))
+
+
+class PerformerColumns(TableColumns):
+    table = Performer
+    schema = (('performer_id', None), ('performer_name', truncate(49)), ('performer_type', title_enum(PerformerType)), ('is_a_band', None))
+
+
+class VenueColumns(TableColumns):
+    table = Venue
+    schema = (('venue_id', None), ('venue_name', truncate(49)), ('venue_address_id', None), ('venue_capacity', None),
+              ('venue_type', lower_enum(VenueType)))
+
+
+class AddressColumns(TableColumns):
+    table = Address
+    schema = (('address_id', None), ('address_country', truncate(49)), ('address_city', truncate(57)), ('address_street', truncate(59)),
+              ('address_postal_code', truncate(8)), ('address_number', truncate(4)))
+
+
+class StageColumns(TableColumns):
+    table = Stage
+    schema = (('stage_id', None), ('stage_name', None), ('venue_id', None))
+
+
+class SeatColumns(TableColumns):
+    table = Seat
+    schema = (('seat_id', None), ('stage_id', None), ('seat_name', truncate(5)), ('seat_status', lower_enum(SeatStatus)), ('sector', None))
+    renamed = {'sector': 'seat_sector'}
+
+
+# record class -> builder, for Record.to_dict
+for _columns in TableColumns.__subclasses__():
+    _columns.table.columnar = _columns
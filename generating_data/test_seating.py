@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from seating import SeatAllocator
+
+
+def allocator(capacities, seats_per_venue=10, sellable=None):
+    # event i at venue i, every venue with seats_per_venue seats
+    n = len(capacities)
+    seat_venues = np.repeat(np.arange(n), seats_per_venue)
+    return SeatAllocator(np.arange(n), np.arange(n), np.arange(len(seat_venues)), seat_venues, capacities, sellable)
+
+
+def test_venue_with_more_seats_than_capacity_stops_at_capacity():
+    seats = allocator([4])
+    rng = np.random.default_rng(0)
+    event_ids, seat_ids = seats.allocate(4, rng)
+    assert len(set(seat_ids.tolist())) == 4
+    with pytest.raises(ValueError):
+        seats.allocate(1, rng)
+
+
+def test_capped_event_overflow_moves_to_other_events():
+    seats = allocator([3, 10])
+    event_ids, seat_ids = seats.allocate(13, np.random.default_rng(1))
+    assert np.bincount(event_ids).tolist() == [3, 10]
+    assert len(set(zip(event_ids.tolist(), seat_ids.tolist()))) == 13
+
+
+def test_from_tables_caps_at_venue_capacity():
+    events = {'event_id': np.array([7])}
+    subevents = {'event_id': np.array([7, 7]), 'venue_id': np.array([1, 1])}
+    venues = {'venue_id': np.array([1]), 'venue_capacity': np.array([5])}
+    stages = {'stage_id': np.array([0, 1]), 'venue_id': np.array([1, 1])}
+    seats = {'seat_id': np.arange(20), 'stage_id': np.repeat([0, 1], 10)}
+    seating = SeatAllocator.from_tables(events, subevents, venues, stages, seats)
+    rng = np.random.default_rng(2)
+    assert len(seating.allocate(5, rng)[0]) == 5
+    with pytest.raises(ValueError):
+        seating.allocate(1, rng)
+
+
+def test_mark_taken_counts_against_capacity():
+    seats = allocator([4])
+    seats.mark_taken([0, 0, 0], [0, 1, 2])
+    rng = np.random.default_rng(3)
+    assert seats.allocate(1, rng)[1][0] not in (0, 1, 2)
+    with pytest.raises(ValueError):
+        seats.allocate(1, rng)
@@ -0,0 +1,220 @@
+import re
+import time
+from stats import summarize
+from plans import PlanNode
+
+OUTPUT_ADVISOR_FILE = "advisor.txt"
+ADVISOR_RUNS = 3
+ADVISOR_WARMUP = 1
+MAX_INCLUDE_COLUMNS = 3     # indeks pokrywający tylko gdy skan potrzebuje kilku kolumn
+
+
+###############################
+# KANDYDACI
+#
+# Seq Scany z filtrem z planów (EXPLAIN VERBOSE, bez ANALYZE - nie wykonuje zapytań) zamieniamy na
+# propozycje indeksów: btree na kolumnie z warunku, indeks częściowy dla równości z tekstem,
+# indeks wyrażeniowy dla EXTRACT(...) i text_pattern_ops dla wyrażeń regularnych z prefiksem.
+
+
+class Candidate:
+
+    def __init__(self, relation, kind, definition, where=None, include=None):
+        self.relation = relation
+        self.kind = kind
+        self.definition = definition        # to co w nawiasach po ON relation
+        self.where = where
+        self.include = include
+
+    def ddl(self, name):
+        sql = f"CREATE INDEX {name} ON {self.relation} ({self.definition})"
+        if self.include:
+            sql += f" INCLUDE ({', '.join(self.include)})"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql + ";"
+
+    def key(self):
+        return (self.relation, self.definition, self.where, tuple(self.include or ()))
+
+
+def clean_filter(condition):
+    # usuwa rzutowania typów i aliasy tabel: "((p.purchase_total_price)::double precision > '15'::double precision)"
+    condition = re.sub(r"::[a-z_]+( [a-z]+)*(\[\])?", "", condition)
+    condition = re.sub(r"\b[a-z_]\w*\.([a-z_]\w*)", r"\1", condition)
+    return condition
+
+
+def strip_parens(condition):
+    # zdejmuje tylko nawiasy obejmujące całe wyrażenie: "((a) = 'x')" -> "(a) = 'x'", ale "(a) = (b)" zostaje
+    condition = condition.strip()
+    while condition.startswith("(") and top_level_end(condition) == len(condition) - 1:
+        condition = condition[1:-1].strip()
+    return condition
+
+
+def top_level_end(condition):
+    # indeks nawiasu zamykającego ten otwarty na pozycji 0 (tekst w '...' pomijany)
+    depth = 0
+    quoted = False
+    for i, char in enumerate(condition):
+        if char == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def split_conditions(condition):
+    # dzieli tylko po AND na najwyższym poziomie - AND wewnątrz nawiasów (np. z OR) zostaje w jednym warunku
+    condition = strip_parens(condition)
+    parts = []
+    depth = 0
+    quoted = False
+    start = 0
+    for match in re.finditer(r"'|\(|\)|\s+AND\s+", condition):
+        token = match.group()
+        if token == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0:
+            parts.append(condition[start:match.start()])
+            start = match.end()
+    parts.append(condition[start:])
+    return [strip_parens(part) for part in parts]
+
+
+def primary_key(cursor, relation):
+    # jednokolumnowy klucz główny tabeli z katalogu, None gdy go nie ma
+    cursor.execute("SELECT a.attname FROM pg_index i "
+                   "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+                   "WHERE i.indrelid = %s::regclass AND i.indisprimary;", (relation,))
+    rows = cursor.fetchall()
+    return rows[0][0] if len(rows) == 1 else None
+
+
+def candidates_for_scan(node, output_columns, key=None):
+    relation = node.relation
+    found = []
+    for condition in split_conditions(clean_filter(node.filter)):
+        if re.search(r"\sOR\s", condition):
+            # alternatywa - żaden pojedynczy warunek nie zawęża skanu
+            continue
+        extract = re.search(r"EXTRACT\((\w+) FROM \(?(\w+)\)?\)", condition, re.IGNORECASE)
+        if extract:
+            field, column = extract.groups()
+            found.append(Candidate(relation, "wyrażeniowy", f"(EXTRACT({field.upper()} FROM {column}))"))
+            continue
+
+        regex = re.search(r"\(?(\w+)\)? ~ '\^([^']*)'", condition)
+        if regex:
+            found.append(Candidate(relation, "wzorzec (prefiks)", f"{regex.group(1)} text_pattern_ops"))
+            continue
+
+        compare = re.search(r"\(?(\w+)\)? (=|<>|<|>|<=|>=) (?:ANY \()?(?:'([^']*)'|(-?[\d.]+))", condition)
+        if not compare:
+            continue
+        column, op, text_value, number = compare.groups()
+        value = text_value if text_value is not None else number
+        if op == "<>":
+            continue
+        found.append(Candidate(relation, "btree", column))
+
+        include = [c for c in output_columns if c != column]
+        if 0 < len(include) <= MAX_INCLUDE_COLUMNS:
+            found.append(Candidate(relation, "pokrywający", column, include=include))
+
+        if op == "=" and key and not re.fullmatch(r"-?[\d.]+", value):
+            # mało selektywna równość na tekście (np. typ) - indeks częściowy po kluczu tabeli
+            found.append(Candidate(relation, "częściowy", key, where=f"{column} = '{value}'"))
+    return found
+
+
+def scan_nodes(node):
+    for _, _, n in node.walk():
+        if n.node_type in ("Seq Scan", "Parallel Seq Scan") and n.filter and n.relation:
+            yield n
+
+
+def workload_candidates(cursor, procedures):
+    # {klucz: (Candidate, set(indeksy transakcji, które skanują tę tabelę))}
+    candidates = {}
+    keys = {}
+    for i, procedure in enumerate(procedures):
+        cursor.execute(f"EXPLAIN (VERBOSE, FORMAT JSON) {procedure};")
+        raw = cursor.fetchone()[0]
+        raw = raw[0] if isinstance(raw, list) else raw
+        root = PlanNode(raw["Plan"])
+        for scan in scan_nodes(root):
+            output = [clean_filter(c) for c in scan_output(raw["Plan"], scan)]
+            if scan.relation not in keys:
+                keys[scan.relation] = primary_key(cursor, scan.relation)
+            for candidate in candidates_for_scan(scan, output, keys[scan.relation]):
+                candidates.setdefault(candidate.key(), (candidate, set()))[1].add(i)
+    return list(candidates.values())
+
+
+def scan_output(plan, scan):
+    # kolumny "Output" węzła skanu (PlanNode ich nie trzyma, szukamy w surowym JSON-ie)
+    if plan.get("Relation Name") == scan.relation and plan.get("Filter") == scan.filter:
+        return [c for c in plan.get("Output", []) if re.fullmatch(r"(\w+\.)?\w+", c)]
+    for child in plan.get("Plans", []):
+        found = scan_output(child, scan)
+        if found:
+            return found
+    return []
+
+
+###############################
+# POMIARY
+
+
+def measure(cursor, procedure, time_query, runs, warmup):
+    for _ in range(warmup):
+        time_query(cursor, procedure)
+    return summarize([time_query(cursor, procedure) for _ in range(runs)])["median"]
+
+
+def run_advisor(cursor, procedures, time_query, runs=ADVISOR_RUNS, warmup=ADVISOR_WARMUP):
+    # time_query(cursor, sql) -> sekundy (lab6.execute_procedure); połączenie w trybie autocommit
+    names = [f"Transakcja {i}" for i in range(1, len(procedures) + 1)]
+    candidates = workload_candidates(cursor, procedures)
+    print(f"Advisor: {len(candidates)} kandydatów")
+
+    baseline = {i: measure(cursor, procedures[i], time_query, runs, warmup) for i in range(len(procedures))}
+    report = [f"Bazowe mediany ({runs} uruchomień): " + ", ".join(f"{names[i]}: {t:.3f} s" for i, t in baseline.items())]
+
+    for n, (candidate, affected) in enumerate(candidates):
+        name = f"advisor_idx_{n}"
+        ddl = candidate.ddl(name)
+        print(f"Testing {ddl}")
+        report.append("-" * 80)
+        report.append(f"[{candidate.kind}] {ddl}")
+        try:
+            start = time.perf_counter()
+            cursor.execute(ddl)
+            build_time = time.perf_counter() - start
+            cursor.execute(f"ANALYZE {candidate.relation};")
+            cursor.execute("SELECT pg_relation_size(%s::regclass);", (name,))
+            size = cursor.fetchone()[0]
+            report.append(f"    budowa: {build_time:.2f} s, rozmiar: {size / 1024 / 1024:.1f} MB")
+
+            for i in sorted(affected):
+                t = measure(cursor, procedures[i], time_query, runs, warmup)
+                report.append(f"    {names[i]}: {baseline[i]:.3f} s -> {t:.3f} s (x{baseline[i] / t:.2f})")
+        except Exception as e:
+            report.append(f"    błąd: {e}")
+        finally:
+            cursor.execute(f"DROP INDEX IF EXISTS {name};")
+    return report
@@ -1,6 +1,19 @@
 import pg8000
 import csv
+import os
+import sys
 import time
+import argparse
+from stats import summarize
+from plans import capture_plan, format_plan, append_history, diff_runs, new_run_id, PLAN_HISTORY_FILE
+from advisor import run_advisor, OUTPUT_ADVISOR_FILE
+from variants import load_variants, run_variants, VARIANTS_FILE, OUTPUT_VARIANTS_FILE
+from pool import ConnectionPool, POOL_SIZE
+from workload import load_templates, render, to_prepared, TEMPLATES_FILE, ZIPF_S
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "generating_data"))
+from scale import SCALE_FACTOR, minimum_counts
+from scaling import run_scaling, scaling_report, save_scaling_data, SCALE_FACTORS, OUTPUT_SCALING_FILE, OUTPUT_SCALING_DATA
+from loadtest import run_load_test, save_load_results, OUTPUT_LOAD_FILE, NUM_WORKERS, DURATION
 
 DB_SETTINGS = {
     "database": "bazy",
@@ -13,23 +26,15 @@ DB_SETTINGS = {
 PROCEDURES = []
 OUTPUT_FILE = "results.txt"
 OUTPUT_PLANS_FILE = "plans.txt"
-NUM_RUNS = 2
-
-def check_record_counts(cursor):
-    # Wymagane liczby rekordów
-    required_counts = {
-        "Ticket": 1000000,
-        "Purchase": 950000,
-        "Event": 85000,
-        "Organizer": 800,
-        "Customer": 800000,
-        "Venue": 2100,
-        "Performer": 17000,
-        "Subevent": 111563,
-        "Address": 2100,
-        "Stage": 2588,
-        "Seat": 132123
-    }
+NUM_RUNS = 10
+NUM_WARMUP = 1      # rozgrzewkowe uruchomienia (cache, JIT) - nie wchodzą do wyników
+PLAN_RUNS = 1       # w ilu pierwszych rundach zbieramy plan (EXPLAIN ANALYZE to dodatkowe wykonanie zapytania)
+OUTPUT_DIFF_FILE = "plan_diff.txt"
+
+def check_record_counts(cursor, sf=SCALE_FACTOR):
+    # Wymagane liczby rekordów - te same rozmiary co w generatorze dla danego scale factor
+    # (Subevent, Stage i Seat są losowe, więc z zapasem kilku odchyleń standardowych)
+    required_counts = minimum_counts(sf)
 
     # Wynik
     insufficient_data = []
@@ -68,23 +73,42 @@ def load_queries_from_file(file_path):
     return queries
 
 def execute_procedure(cursor, procedure_name):
-    start_time = time.time()
+    # czas po stronie klienta: wysłanie, planowanie, wykonanie i pobranie wszystkich wierszy
+    start_time = time.perf_counter_ns()
     cursor.execute(f"{procedure_name};")
-    execution_time = time.time() - start_time
+    cursor.fetchall()
+    execution_time = (time.perf_counter_ns() - start_time) / 1e9
 
     return execution_time
 
 
-def get_query_plan(cursor, procedure_name):
-    cursor.execute(f"EXPLAIN ANALYZE {procedure_name};")
+def format_result(count, timings):
+    client = summarize(timings["client"])
+    server = summarize(timings["server"])
+    planning = summarize(timings["planning"])
+    ci = f"{client['ci_low']:.3f}-{client['ci_high']:.3f}"
+    row = (f"Transakcja {count:}:   {client['min']:<15.3f} {client['max']:<15.3f} {client['mean']:<15.3f} "
+           f"{client['median']:<15.3f} {client['stddev']:<15.3f} {client['p95']:<15.3f} {ci:<17} ")
+    if server is None or planning is None:
+        # bez zebranych planów nie ma czasów serwera
+        return row + f"{'n/a':<15} {'n/a':<15} {'n/a':<15}"
+    # to co zostaje z czasu klienta po odjęciu pracy serwera: round-trip, transfer i parsowanie wierszy
+    overhead = client["median"] - server["median"] - planning["median"]
+    return row + f"{server['median']:<15.3f} {planning['median']:<15.4f} {overhead:<15.3f}"
+
 
-    return "\n".join(row[0] for row in cursor.fetchall())
+def get_query_plan(cursor, procedure_name):
+    # plan z EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) sparsowany do drzewa PlanNode
+    return capture_plan(cursor, procedure_name)
 
 
-def save_to_txt(filename, data):
+def save_to_txt(filename, data, mode="zapytania tekstowe"):
     with open(filename, mode='w') as file:
-        file.write("Liczba uruchomień transkacji: " + str(NUM_RUNS) + "\n")
-        file.write("{:<15} {:<15} {:<15} {:<15}\n".format("Procedure", "Min Time (s)", "Max Time (s)", "Avg Time (s)"))
+        file.write("Liczba uruchomień transkacji: " + str(NUM_RUNS) + " (+ " + str(NUM_WARMUP) + " rozgrzewkowych)\n")
+        file.write("Tryb: " + mode + "\n")
+        file.write("{:<15} {:<15} {:<15} {:<15} {:<15} {:<15} {:<15} {:<17} {:<15} {:<15} {:<15}\n".format(
+            "Procedure", "Min Time (s)", "Max Time (s)", "Avg Time (s)", "Median (s)", "Stddev (s)", "p95 (s)", "CI95 avg (s)",
+            "Server exec (s)", "Planning (s)", "Transfer (s)"))
         for row in data:
             file.write("".join(map(str, row)) + "\n")
 
@@ -93,59 +117,193 @@ def save_plans(filename, data):
     with open(filename, mode='w') as file:
         file.write("Zebrane plany zapytań:")
         file.write("-" * 80 + "\n")
-        for row in data:
+        for name, plan in data:
             file.write("-" * 80 + "\n")
-            file.write("Transakcja:\n")
-            file.write("".join(str(row) + "\n"))
+            file.write(f"{name}:\n")
+            file.write(format_plan(plan) + "\n")
+
+def load_procedures(templates=None, seed=0, zipf_s=ZIPF_S):
+    # stałe zapytania z transakcje.txt albo szablony z parametrami losowanymi przy każdym wykonaniu
+    if templates:
+        return load_templates(templates, seed, zipf_s)
+    return load_queries_from_file("transakcje.txt")
 
-def main():
+
+def main(pool_size=POOL_SIZE, prepared=False, plan_runs=PLAN_RUNS, templates=None, seed=0, zipf_s=ZIPF_S, sf=SCALE_FACTOR):
     results = []
     plans = []      # Zapisuje plany wykonania do oddzielnego pliku
-    PROCEDURES = load_queries_from_file("transakcje.txt")
+    run_id = new_run_id()
+    PROCEDURES = load_procedures(templates, seed, zipf_s)
+    pool = ConnectionPool(DB_SETTINGS, size=pool_size)
 
     try:
-        conn = pg8000.connect(**DB_SETTINGS)
-        conn.autocommit = True
-        cursor = conn.cursor()
+        with pool.connection() as pc:
+            cursor = pc.cursor
+
+            # Sprawdzanie liczby rekordów
+            insufficient_data = check_record_counts(cursor, sf)
+            if insufficient_data:
+                print("Zatrzymano wykonanie testów obciążenia z powodu niewystarczającej liczby danych.")
+                return
+
+            if prepared:
+                # PREPARE raz na połączenie, potem EXECUTE z parametrami - planowanie liczone osobno od wykonania
+                transactions = {procedure: to_prepared(procedure) for procedure in PROCEDURES}
+                prepare_times = {procedure: t.prepare(pc) for procedure, t in transactions.items()}
+                draw = lambda procedure: transactions[procedure].params()
+                time_query = lambda procedure, params: transactions[procedure].execute(pc, params)
+                plan_query = lambda procedure, params: transactions[procedure].explain(pc, params)
+            else:
+                draw = render
+                time_query = lambda procedure, sql: execute_procedure(cursor, sql)
+                plan_query = lambda procedure, sql: get_query_plan(cursor, sql)
+
+            times = {procedure: {"client": [], "server": [], "planning": []} for procedure in PROCEDURES}
+
+            for run in range(1, NUM_WARMUP + 1):
+                print(f"Warmup round {run}...")
+                for procedure in PROCEDURES:
+                    time_query(procedure, draw(procedure))
+
+            for run in range(1, NUM_RUNS + 1):
+                print(f"Running round {run}...")
+
+                for count, procedure in enumerate(PROCEDURES, 1):
+                    # parametry losowane raz na rundę - pomiar klienta i EXPLAIN ANALYZE dostają te same wartości
+                    args = draw(procedure)
+                    exec_time = time_query(procedure, args)
+                    times[procedure]["client"].append(exec_time)
+                    if run <= plan_runs:
+                        query_plan = plan_query(procedure, args)
+                        times[procedure]["planning"].append(query_plan.planning_time)
+                        times[procedure]["server"].append(query_plan.execution_time)
+                        if run == 1:
+                            plans.append((f"Transakcja {count}", query_plan))
+                            append_history(PLAN_HISTORY_FILE, run_id, f"Transakcja {count}", str(procedure), query_plan)
+
+            count = 1
+            for procedure in PROCEDURES:
+                results.append("-" * 80)
+                results.append(format_result(count, times[procedure]))
+                if prepared:
+                    results.append(f"    PREPARE: {prepare_times[procedure]:.4f} s")
+                count += 1
+
+            mode = f"PREPARE/EXECUTE, plan zbierany w {plan_runs} rundach" if prepared else "zapytania tekstowe"
+            if templates:
+                mode += f", szablony {templates} (seed {seed}, zipf s={zipf_s})"
+            save_to_txt(OUTPUT_FILE, results, mode)
+            print(f"Benchmark results saved to {OUTPUT_FILE}")
+            save_plans(OUTPUT_PLANS_FILE, plans)
+            print(f"Plans saved to {OUTPUT_PLANS_FILE} and {PLAN_HISTORY_FILE}")
+
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        pool.close()
 
-        # Sprawdzanie liczby rekordów
-        insufficient_data = check_record_counts(cursor)
-        if insufficient_data:
-            print("Zatrzymano wykonanie testów obciążenia z powodu niewystarczającej liczby danych.")
-            return
 
-        times = {procedure: [] for procedure in PROCEDURES}
+def diff_main(old_run, new_run):
+    report = diff_runs(PLAN_HISTORY_FILE, old_run, new_run)
+    for row in report:
+        print(row)
+    save_load_results(OUTPUT_DIFF_FILE, report)
+    print(f"Plan diff saved to {OUTPUT_DIFF_FILE}")
 
-        for run in range(1, NUM_RUNS + 1):
-            print(f"Running round {run}...")
 
-            for procedure in PROCEDURES:
-                query_plan = None
-                exec_time = execute_procedure(cursor, procedure)
-                times[procedure].append(exec_time)
-                query_plan = get_query_plan(cursor, procedure)
-                plans.append(query_plan)  # Dodajemy plan dla każdego uruchomienia transakcji
-
-        count = 1
-        for procedure in PROCEDURES:
-            min_time = round(min(times[procedure]), 3)
-            max_time = round(max(times[procedure]), 3)
-            avg_time = round(sum(times[procedure]) / len(times[procedure]), 3)
-            results.append("-" * 80)
-            results.append(f"Transakcja {count:}:   {min_time:<15} {max_time:<15} {avg_time:<15}")
-            count += 1
-
-        save_to_txt(OUTPUT_FILE, results)
-        print(f"Benchmark results saved to {OUTPUT_FILE}")
-        save_plans(OUTPUT_PLANS_FILE, plans)
-        print(f"Plans saved to {OUTPUT_PLANS_FILE}")
+def advisor_main():
+    PROCEDURES = load_queries_from_file("transakcje.txt")
+    conn = pg8000.connect(**DB_SETTINGS)
+    conn.autocommit = True
+    try:
+        report = run_advisor(conn.cursor(), PROCEDURES, execute_procedure)
+    finally:
+        conn.close()
+    for row in report:
+        print(row)
+    save_load_results(OUTPUT_ADVISOR_FILE, report)
+    print(f"Advisor results saved to {OUTPUT_ADVISOR_FILE}")
 
-    except Exception as e:
-        print(f"Error: {e}")
+
+def variants_main(variants_file):
+    groups = load_variants(variants_file)
+    conn = pg8000.connect(**DB_SETTINGS)
+    conn.autocommit = True
+    try:
+        report = run_variants(conn.cursor(), groups, execute_procedure)
     finally:
-        if conn:
-            conn.close()
+        conn.close()
+    for row in report:
+        print(row)
+    save_load_results(OUTPUT_VARIANTS_FILE, report)
+    print(f"Variant results saved to {OUTPUT_VARIANTS_FILE}")
+
+
+def load_dataset(sf):
+    # generuje dane dla danego scale factor i ładuje je COPY do bazy (generating_data/loader.py)
+    import create_records
+    import loader
+    create_records.set_scale_factor(sf)
+    loader.load(DB_SETTINGS)
+
+
+def scaling_main(scale_factors, templates=None, seed=0, zipf_s=ZIPF_S):
+    PROCEDURES = load_procedures(templates, seed, zipf_s)
+    names = [f"Transakcja {i}" for i in range(1, len(PROCEDURES) + 1)]
+    points = run_scaling(DB_SETTINGS, PROCEDURES, load_dataset, list(minimum_counts()),
+                         lambda cursor, procedure: execute_procedure(cursor, render(procedure)), scale_factors)
+    report = scaling_report(points, names)
+    for row in report:
+        print(row)
+    save_load_results(OUTPUT_SCALING_FILE, report)
+    save_scaling_data(OUTPUT_SCALING_DATA, points, names)
+    print(f"Scaling results saved to {OUTPUT_SCALING_FILE} and {OUTPUT_SCALING_DATA}")
+
+
+def load_main(n_workers, duration, max_ops, mix, pool_size=None, prepared=False, templates=None, seed=0, zipf_s=ZIPF_S):
+    PROCEDURES = load_procedures(templates, seed, zipf_s)
+    print(f"Load test: {n_workers} klientów, mix: {mix or 'równy'}")
+    results = run_load_test(DB_SETTINGS, PROCEDURES, n_workers=n_workers, duration=duration, max_ops=max_ops, mix=mix,
+                            pool_size=pool_size, prepared=prepared)
+    for row in results:
+        print(row)
+    save_load_results(OUTPUT_LOAD_FILE, results)
+    print(f"Load test results saved to {OUTPUT_LOAD_FILE}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", nargs="?", default="benchmark", choices=["benchmark", "load", "diff", "advisor", "variants", "scaling"])
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS, help="liczba równoległych klientów (load)")
+    parser.add_argument("--duration", type=float, default=DURATION, help="czas testu w sekundach (load)")
+    parser.add_argument("--ops", type=int, default=None, help="łączna liczba operacji zamiast czasu (load)")
+    parser.add_argument("--mix", default=None, help="wagi transakcji, np. 1:4,2:1,3:2,4:2 (load)")
+    parser.add_argument("--pool-size", type=int, default=None, help="rozmiar puli połączeń (load: domyślnie = --workers)")
+    parser.add_argument("--prepared", action="store_true", help="transakcje jako PREPARE/EXECUTE z parametrami (benchmark, load)")
+    parser.add_argument("--plan-runs", type=int, default=PLAN_RUNS, help="w ilu rundach mierzyć planowanie i wykonanie (benchmark)")
+    parser.add_argument("--templates", nargs="?", const=TEMPLATES_FILE, default=None,
+                        help=f"transakcje z parametrami losowanymi z rozkładów generatora (benchmark, load; domyślnie {TEMPLATES_FILE})")
+    parser.add_argument("--zipf", type=float, default=ZIPF_S, help="wykładnik Zipfa dla gorących wartości parametrów, 0 = jak w danych")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno losowania parametrów")
+    parser.add_argument("--sf", type=float, default=SCALE_FACTOR, help="scale factor danych w bazie (benchmark)")
+    parser.add_argument("--sfs", default=",".join(map(str, SCALE_FACTORS)),
+                        help="wielkości danych do porównania, np. 0.1,0.3,1,3 (scaling - nadpisuje dane w bazie)")
+    parser.add_argument("--variants-file", default=VARIANTS_FILE, help="grupy równoważnych zapytań (variants)")
+    parser.add_argument("--old-run", default=None, help="uruchomienie z plan_history.jsonl (diff, domyślnie przedostatnie)")
+    parser.add_argument("--new-run", default=None, help="uruchomienie z plan_history.jsonl (diff, domyślnie ostatnie)")
+    args = parser.parse_args()
+    if args.plan_runs < 1:
+        parser.error("--plan-runs musi być co najmniej 1")
+
+    if args.mode == "load":
+        load_main(args.workers, args.duration, args.ops, args.mix, args.pool_size, args.prepared, args.templates, args.seed, args.zipf)
+    elif args.mode == "diff":
+        diff_main(args.old_run, args.new_run)
+    elif args.mode == "advisor":
+        advisor_main()
+    elif args.mode == "scaling":
+        scaling_main([float(sf) for sf in args.sfs.split(",")], args.templates, args.seed, args.zipf)
+    elif args.mode == "variants":
+        variants_main(args.variants_file)
+    else:
+        main(args.pool_size or POOL_SIZE, args.prepared, args.plan_runs, args.templates, args.seed, args.zipf, args.sf)
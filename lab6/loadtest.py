@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+from stats import percentile
+from pool import ConnectionPool
+from workload import render, to_prepared
+
+OUTPUT_LOAD_FILE = "load_results.txt"
+NUM_WORKERS = 8
+DURATION = 60.0     # sekundy, gdy nie podano liczby operacji
+
+
+class LoadStats:
+    # czasy i błędy per transakcja, wspólne dla wszystkich wątków
+
+    def __init__(self, names):
+        self.lock = threading.Lock()
+        self.latencies = {name: [] for name in names}
+        self.errors = {name: 0 for name in names}
+        self.last_error = {}
+        self.ops = 0
+        self.started = 0
+
+    def start_op(self, max_ops):
+        # rezerwuje kolejną operację, False gdy limit max_ops został wyczerpany
+        with self.lock:
+            if max_ops is not None and self.started >= max_ops:
+                return False
+            self.started += 1
+            return True
+
+    def record(self, name, latency=None, error=None):
+        with self.lock:
+            self.ops += 1
+            if error is not None:
+                self.errors[name] += 1
+                self.last_error[name] = error
+            else:
+                self.latencies[name].append(latency)
+
+
+def parse_mix(mix, names):
+    # "1:4,2:1" -> wagi transakcji (numeracja od 1 jak w results.txt), brak = równe wagi
+    if not mix:
+        return [1.0] * len(names)
+    weights = [0.0] * len(names)
+    for part in mix.split(","):
+        idx, weight = part.split(":")
+        weights[int(idx) - 1] = float(weight)
+    return weights
+
+
+def simple_query(procedure):
+    def run(pc):
+        pc.cursor.execute(f"{render(procedure)};")
+        pc.cursor.fetchall()
+    return run
+
+
+def worker(pool, transactions, names, weights, stats, stop_at, max_ops, seed):
+    # każda operacja bierze połączenie z puli na czas jednej transakcji - czas obejmuje też czekanie na pulę
+    rng = random.Random(seed)
+    while time.perf_counter() < stop_at and stats.start_op(max_ops):
+        i = rng.choices(range(len(transactions)), weights=weights, k=1)[0]
+        start = time.perf_counter()
+        try:
+            with pool.connection() as pc:
+                transactions[i](pc)
+        except Exception as e:
+            stats.record(names[i], error=str(e))
+            continue
+        stats.record(names[i], time.perf_counter() - start)
+
+
+def run_load_test(db_settings, procedures, n_workers=NUM_WORKERS, duration=DURATION, max_ops=None, mix=None, seed=0,
+                  pool_size=None, prepared=False):
+    # n_workers klientów dzielących pulę pool_size połączeń (domyślnie po jednym na klienta), losuje transakcje
+    # wg mix przez `duration` sekund albo aż wszyscy razem wykonają max_ops operacji
+    names = [f"Transakcja {i}" for i in range(1, len(procedures) + 1)]
+    weights = parse_mix(mix, names)
+    stats = LoadStats(names)
+    pool = ConnectionPool(db_settings, size=pool_size or n_workers)
+    if prepared:
+        transactions = [to_prepared(procedure).execute for procedure in procedures]
+    else:
+        transactions = [simple_query(procedure) for procedure in procedures]
+
+    start = time.perf_counter()
+    stop_at = start + duration if max_ops is None else float("inf")
+    threads = [threading.Thread(target=worker, args=(pool, transactions, names, weights, stats, stop_at, max_ops, seed + i))
+               for i in range(n_workers)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        pool.close()
+    elapsed = time.perf_counter() - start
+
+    return summarize_load(stats, names, elapsed, n_workers, pool)
+
+
+def summarize_load(stats, names, elapsed, n_workers, pool):
+    results = [f"Klienci: {n_workers}, pula: {pool.size} (wymienione połączenia: {pool.replaced}), czas: {elapsed:.1f} s, "
+               f"operacje: {stats.ops}, TPS: {stats.ops / elapsed:.2f}"]
+    results.append("{:<15} {:<10} {:<10} {:<10} {:<12} {:<12} {:<12}".format(
+        "Procedure", "Ops", "Errors", "TPS", "p50 (s)", "p95 (s)", "p99 (s)"))
+    for name in names:
+        lat = stats.latencies[name]
+        results.append("-" * 80)
+        results.append(f"{name + ':':<15} {len(lat):<10} {stats.errors[name]:<10} {len(lat) / elapsed:<10.2f} "
+                       f"{percentile(lat, 50):<12.4f} {percentile(lat, 95):<12.4f} {percentile(lat, 99):<12.4f}")
+        if name in stats.last_error:
+            results.append(f"    Ostatni błąd: {stats.last_error[name]}")
+    return results
+
+
+def save_load_results(filename, results):
+    with open(filename, mode='w') as file:
+        for row in results:
+            file.write(row + "\n")
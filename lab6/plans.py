@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+PLAN_HISTORY_FILE = "plan_history.jsonl"
+
+# progi dla diff_plans
+MISESTIMATE_FACTOR = 10     # rzeczywiste wiersze / szacowane (lub odwrotnie)
+REGRESSION_FACTOR = 1.5     # czas węzła nowy / stary
+REGRESSION_MIN_MS = 5.0     # pomijamy węzły, które i tak są szybkie
+
+
+class PlanNode:
+    # jeden węzeł z EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+
+    def __init__(self, plan):
+        self.node_type = plan["Node Type"]
+        self.relation = plan.get("Relation Name") or plan.get("Index Name")
+        self.startup_cost = plan.get("Startup Cost")
+        self.total_cost = plan.get("Total Cost")
+        self.plan_rows = plan.get("Plan Rows", 0)
+        self.actual_rows = plan.get("Actual Rows", 0)
+        self.actual_time = plan.get("Actual Total Time", 0.0)     # ms, na jedną pętlę
+        self.loops = plan.get("Actual Loops", 1)
+        self.shared_hit = plan.get("Shared Hit Blocks", 0)
+        self.shared_read = plan.get("Shared Read Blocks", 0)
+        self.filter = plan.get("Filter") or plan.get("Index Cond") or plan.get("Hash Cond")
+        self.children = [PlanNode(p) for p in plan.get("Plans", [])]
+
+    @property
+    def label(self):
+        return f"{self.node_type} on {self.relation}" if self.relation else self.node_type
+
+    @property
+    def total_time(self):
+        return self.actual_time * self.loops
+
+    def misestimate(self):
+        # ile razy planner się pomylił (>= 1), liczone per pętla jak w EXPLAIN
+        est, act = max(self.plan_rows, 1), max(self.actual_rows, 1)
+        return max(est / act, act / est)
+
+    def walk(self, depth=0, path=()):
+        # (głębokość, ścieżka pozycji od korzenia, węzeł) w kolejności preorder
+        yield depth, path, self
+        for i, child in enumerate(self.children):
+            yield from child.walk(depth + 1, path + (i,))
+
+    def shape(self):
+        return [(depth, node.label) for depth, _, node in self.walk()]
+
+
+class QueryPlan:
+
+    def __init__(self, explain_json):
+        # pg8000 zwraca kolumnę json już sparsowaną, ale na wszelki wypadek obsługujemy też tekst
+        if isinstance(explain_json, str):
+            explain_json = json.loads(explain_json)
+        self.raw = explain_json[0] if isinstance(explain_json, list) else explain_json
+        self.root = PlanNode(self.raw["Plan"])
+        self.planning_time = self.raw.get("Planning Time", float("nan")) / 1000
+        self.execution_time = self.raw.get("Execution Time", float("nan")) / 1000
+
+
+def capture_plan(cursor, procedure_name, params=()):
+    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {procedure_name};", params)
+    return QueryPlan(cursor.fetchone()[0])
+
+
+def format_plan(plan):
+    lines = [f"Planning Time: {plan.planning_time * 1000:.3f} ms, Execution Time: {plan.execution_time * 1000:.3f} ms"]
+    for depth, _, node in plan.root.walk():
+        lines.append(f"{'  ' * depth}-> {node.label}  (cost={node.startup_cost}..{node.total_cost} rows={node.plan_rows}) "
+                     f"(actual time={node.actual_time:.3f} rows={node.actual_rows} loops={node.loops}) "
+                     f"(buffers hit={node.shared_hit} read={node.shared_read})")
+        if node.filter:
+            lines.append(f"{'  ' * depth}     {node.filter}")
+    return "\n".join(lines)
+
+
+###############################
+# HISTORIA PLANÓW
+
+
+def query_hash(procedure_name):
+    return hashlib.sha1(" ".join(procedure_name.split()).encode()).hexdigest()[:12]
+
+
+def append_history(filename, run_id, name, procedure_name, plan):
+    with open(filename, mode='a') as file:
+        file.write(json.dumps({
+            "run": run_id,
+            "transaction": name,
+            "query": query_hash(procedure_name),
+            "plan": plan.raw,
+        }) + "\n")
+
+
+def load_history(filename):
+    # {run: {transaction: QueryPlan}} w kolejności zapisu
+    history = {}
+    if not os.path.exists(filename):
+        return history
+    with open(filename) as file:
+        for line in file:
+            if line.strip():
+                entry = json.loads(line)
+                plan = QueryPlan(entry["plan"])
+                plan.query = entry["query"]
+                history.setdefault(entry["run"], {})[entry["transaction"]] = plan
+    return history
+
+
+def new_run_id():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+###############################
+# DIFF
+
+
+def diff_plans(old, new):
+    # lista znalezisk dla jednej transakcji: zmiana kształtu planu, złe szacunki wierszy, regresje czasu węzłów
+    findings = []
+    if old.root.shape() != new.root.shape():
+        old_labels = [label for _, label in old.root.shape()]
+        new_labels = [label for _, label in new.root.shape()]
+        removed = [l for l in old_labels if l not in new_labels]
+        added = [l for l in new_labels if l not in old_labels]
+        if removed or added:
+            findings.append("ZMIANA PLANU: " + " / ".join(removed) + " -> " + " / ".join(added))
+        else:
+            findings.append("ZMIANA PLANU: te same węzły w innym układzie")
+
+    for _, _, node in new.root.walk():
+        if node.misestimate() >= MISESTIMATE_FACTOR:
+            findings.append(f"ZŁY SZACUNEK: {node.label}: szacowane {node.plan_rows}, rzeczywiste {node.actual_rows} "
+                            f"(x{node.misestimate():.0f})")
+
+    old_nodes = {path: node for _, path, node in old.root.walk()}
+    for _, path, node in new.root.walk():
+        before = old_nodes.get(path)
+        if before is None or before.label != node.label:
+            continue
+        if node.total_time >= REGRESSION_MIN_MS and node.total_time >= before.total_time * REGRESSION_FACTOR:
+            findings.append(f"REGRESJA: {node.label}: {before.total_time:.1f} ms -> {node.total_time:.1f} ms")
+
+    if new.execution_time >= old.execution_time * REGRESSION_FACTOR:
+        findings.append(f"REGRESJA CAŁOŚCI: {old.execution_time:.3f} s -> {new.execution_time:.3f} s")
+    return findings
+
+
+def diff_runs(filename, old_run=None, new_run=None):
+    # domyślnie porównuje dwa ostatnie uruchomienia z historii
+    history = load_history(filename)
+    runs = list(history)
+    if len(runs) < 2 and (old_run is None or new_run is None):
+        return ["Za mało uruchomień w historii planów do porównania."]
+    old_run = old_run or runs[-2]
+    new_run = new_run or runs[-1]
+    missing = [run for run in (old_run, new_run) if run not in history]
+    if missing:
+        return [f"Brak uruchomienia w historii planów: {', '.join(missing)}",
+                "Dostępne uruchomienia: " + (", ".join(runs) or "brak")]
+
+    report = [f"Porównanie planów: {old_run} -> {new_run}"]
+    for name, new in history[new_run].items():
+        old = history[old_run].get(name)
+        report.append("-" * 80)
+        if old is None:
+            report.append(f"{name}: brak w {old_run}")
+            continue
+        findings = diff_plans(old, new)
+        if old.query != new.query:
+            findings.insert(0, "UWAGA: zmienił się tekst zapytania")
+        report.append(f"{name}: " + ("bez zmian" if not findings else f"{len(findings)} uwag"))
+        report.extend("    " + f for f in findings)
+    return report
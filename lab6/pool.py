@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+import pg8000
+
+POOL_SIZE = 4
+HEALTH_CHECK_INTERVAL = 30.0    # sekundy bezczynności, po których połączenie jest sprawdzane przed wydaniem
+
+
+class PooledConnection:
+    # połączenie z puli razem z instrukcjami przygotowanymi na nim (PREPARE żyje tylko w obrębie sesji)
+
+    def __init__(self, db_settings):
+        self.conn = pg8000.connect(**db_settings)
+        self.conn.autocommit = True
+        self.cursor = self.conn.cursor()
+        self.prepared = set()
+        self.last_used = time.monotonic()
+
+    def is_alive(self):
+        try:
+            self.cursor.execute("SELECT 1;")
+            self.cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    # do `size` połączeń tworzonych leniwie; zepsute połączenia są zamykane i zastępowane nowymi
+
+    def __init__(self, db_settings, size=POOL_SIZE, health_check=True, check_interval=HEALTH_CHECK_INTERVAL):
+        self.db_settings = db_settings
+        self.size = size
+        self.health_check = health_check
+        self.check_interval = check_interval
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.replaced = 0
+
+    def _new_connection(self):
+        with self.lock:
+            if self.created >= self.size:
+                return None
+            self.created += 1
+        try:
+            return PooledConnection(self.db_settings)
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
+
+    def acquire(self, timeout=None):
+        try:
+            pc = self.idle.get_nowait()
+        except queue.Empty:
+            pc = self._new_connection() or self.idle.get(timeout=timeout)
+
+        if self.health_check and time.monotonic() - pc.last_used >= self.check_interval and not pc.is_alive():
+            pc.close()
+            pc = PooledConnection(self.db_settings)
+            with self.lock:
+                self.replaced += 1
+        return pc
+
+    def release(self, pc, broken=False):
+        if broken:
+            pc.close()
+            with self.lock:
+                self.created -= 1
+            return
+        pc.last_used = time.monotonic()
+        self.idle.put(pc)
+
+    @contextmanager
+    def connection(self):
+        pc = self.acquire()
+        try:
+            yield pc
+        except Exception:
+            # błąd zapytania nie psuje sesji w autocommit, zerwane połączenie tak
+            self.release(pc, broken=not pc.is_alive())
+            raise
+        self.release(pc)
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,77 @@
+import re
+import time
+from decimal import Decimal
+from plans import capture_plan, query_hash
+
+# literał po operatorze porównania: tekst w apostrofach albo liczba (listy IN i LIMIT zostają w zapytaniu)
+LITERAL = re.compile(r"(=|<>|<=|>=|<|>|~)(\s*)('(?:[^']|'')*'|-?\d+(?:\.\d+)?)(?![\w.])")
+
+
+def sql_literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, (tuple, list)):
+        return "ARRAY[" + ", ".join(map(str, value)) + "]"
+    return str(value)
+
+
+def parameterize(sql):
+    # "WHERE x > 15 AND y = 'a'" -> ("WHERE x > $1 AND y = $2", (15, 'a'))
+    values = []
+
+    def replace(match):
+        op, space, literal = match.groups()
+        if literal.startswith("'"):
+            values.append(literal[1:-1].replace("''", "'"))
+        elif "." in literal:
+            values.append(Decimal(literal))
+        else:
+            values.append(int(literal))
+        return f"{op}{space}${len(values)}"
+
+    return LITERAL.sub(replace, sql.rstrip().rstrip(";")), tuple(values)
+
+
+class PreparedTransaction:
+    # transakcja wykonywana jako PREPARE/EXECUTE; params() zwraca krotkę parametrów dla kolejnego wykonania,
+    # domyślnie literały wyjęte z oryginalnego zapytania; template - gotowe zapytanie z $n (szablony z workload.py)
+
+    def __init__(self, sql, params=None, template=None):
+        self.sql = sql
+        if template is None:
+            self.template, self.defaults = parameterize(sql)
+        else:
+            self.template, self.defaults = template, params()
+        self.name = f"lab6_{query_hash(sql)}"
+        self.params = params or (lambda: self.defaults)
+
+    def execute_sql(self, params):
+        # wartości jako literały SQL - serwer nie analizuje EXECUTE, więc parametry protokołu ($n) w nim nie działają;
+        # typy i tak nadaje PREPARE
+        if not params:
+            return f"EXECUTE {self.name}"
+        return f"EXECUTE {self.name} ({', '.join(sql_literal(value) for value in params)})"
+
+    def prepare(self, pc):
+        # czas PREPARE (parsowanie i analiza, bez planowania), 0 gdy już przygotowana na tym połączeniu
+        if self.name in pc.prepared:
+            return 0.0
+        start_time = time.perf_counter_ns()
+        pc.cursor.execute(f"PREPARE {self.name} AS {self.template};")
+        pc.prepared.add(self.name)
+        return (time.perf_counter_ns() - start_time) / 1e9
+
+    def execute(self, pc, params=None):
+        # params: wartości już wylosowane (np. te same dla pomiaru i EXPLAIN w jednej rundzie), domyślnie params()
+        self.prepare(pc)
+        params = self.params() if params is None else params
+        start_time = time.perf_counter_ns()
+        pc.cursor.execute(self.execute_sql(params) + ";")
+        pc.cursor.fetchall()
+        return (time.perf_counter_ns() - start_time) / 1e9
+
+    def explain(self, pc, params=None):
+        # Planning Time dla EXECUTE to koszt wyboru planu: pełne planowanie dla planu niestandardowego,
+        # prawie zero gdy serwer przeszedł już na plan generyczny
+        self.prepare(pc)
+        return capture_plan(pc.cursor, self.execute_sql(self.params() if params is None else params))
@@ -0,0 +1,131 @@
+import csv
+import math
+import statistics
+import pg8000
+from stats import summarize
+
+SCALE_FACTORS = [0.1, 0.25, 0.5, 1.0]
+OUTPUT_SCALING_FILE = "scaling.txt"
+OUTPUT_SCALING_DATA = "scaling.csv"     # dane do wykresu: pomiary i krzywe dopasowania
+SCALING_RUNS = 5
+SCALING_WARMUP = 1
+EXTRAPOLATE = 10        # prognoza dla tylu razy większej bazy niż największa zmierzona
+CURVE_POINTS = 50
+
+# czas = a + b * f(n), n = liczba wierszy w bazie
+MODELS = {
+    "liniowy": lambda n: n,
+    "n log n": lambda n: n * math.log(n),
+    "kwadratowy": lambda n: n * n,
+}
+
+
+###############################
+# DOPASOWANIE
+
+
+def fit_models(ns, times):
+    # {model: (a, b, R^2)} metodą najmniejszych kwadratów
+    fits = {}
+    mean = statistics.fmean(times)
+    total = sum((t - mean) ** 2 for t in times)
+    for name, f in MODELS.items():
+        b, a = statistics.linear_regression([f(n) for n in ns], times)
+        residual = sum((t - (a + b * f(n))) ** 2 for n, t in zip(ns, times))
+        fits[name] = (a, b, 1 - residual / total if total > 0 else 1.0)
+    return fits
+
+
+def predict(fit, name, n):
+    a, b, _ = fit
+    return a + b * MODELS[name](n)
+
+
+def best_model(fits):
+    return max(fits, key=lambda name: fits[name][2])
+
+
+###############################
+# POMIARY
+
+
+def count_rows(cursor, tables):
+    rows = {}
+    for table in tables:
+        cursor.execute(f"SELECT COUNT(*) FROM {table};")
+        rows[table] = cursor.fetchone()[0]
+    return rows
+
+
+def measure(cursor, procedure, time_query, runs, warmup):
+    for _ in range(warmup):
+        time_query(cursor, procedure)
+    return summarize([time_query(cursor, procedure) for _ in range(runs)])
+
+
+def run_scaling(db_settings, procedures, load, tables, time_query, scale_factors=SCALE_FACTORS,
+                runs=SCALING_RUNS, warmup=SCALING_WARMUP):
+    # load(sf) generuje i ładuje dane danej wielkości, time_query(cursor, procedure) -> sekundy
+    # zwraca [(sf, {tabela: wiersze}, [podsumowanie czasów dla każdej transakcji])]
+    points = []
+    for sf in scale_factors:
+        print(f"SF {sf}: generowanie i ładowanie danych...")
+        load(sf)
+        conn = pg8000.connect(**db_settings)
+        conn.autocommit = True
+        try:
+            cursor = conn.cursor()
+            rows = count_rows(cursor, tables)
+            print(f"SF {sf}: {sum(rows.values())} wierszy, pomiary...")
+            points.append((sf, rows, [measure(cursor, p, time_query, runs, warmup) for p in procedures]))
+        finally:
+            conn.close()
+    return points
+
+
+###############################
+# RAPORT
+
+
+def scaling_report(points, names):
+    ns = [sum(rows.values()) for _, rows, _ in points]
+    target = max(ns) * EXTRAPOLATE
+    report = ["{:<8} {:<14} ".format("SF", "Wiersze") + " ".join(f"{table:<12}" for table in points[0][1])]
+    for (sf, rows, _), n in zip(points, ns):
+        report.append(f"{sf:<8} {n:<14} " + " ".join(f"{count:<12}" for count in rows.values()))
+
+    for i, name in enumerate(names):
+        times = [summaries[i]["median"] for _, _, summaries in points]
+        report.append("=" * 80)
+        report.append(f"{name}:")
+        for (sf, _, summaries), n in zip(points, ns):
+            report.append(f"    SF {sf:<8} n={n:<12} mediana: {summaries[i]['median']:.3f} s, p95: {summaries[i]['p95']:.3f} s")
+        if len(points) < 3:
+            report.append("    Za mało wielkości danych do wyboru krzywej (potrzeba co najmniej 3).")
+            continue
+
+        fits = fit_models(ns, times)
+        best = best_model(fits)
+        for model, (a, b, r2) in fits.items():
+            mark = " <- najlepsze" if model == best else ""
+            report.append(f"    {model:<11} a={a:.4g} b={b:.4g} R^2={r2:.4f}, prognoza dla n={target}: "
+                          f"{predict(fits[model], model, target):.1f} s{mark}")
+    return report
+
+
+def save_scaling_data(filename, points, names):
+    # jeden wiersz na punkt: pomiary ("pomiar") i krzywe każdego modelu do EXTRAPOLATE * największe n
+    ns = [sum(rows.values()) for _, rows, _ in points]
+    with open(filename, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["transaction", "series", "sf", "rows", "seconds"])
+        for i, name in enumerate(names):
+            for (sf, _, summaries), n in zip(points, ns):
+                writer.writerow([name, "pomiar", sf, n, summaries[i]["median"]])
+            if len(points) < 3:
+                continue
+            fits = fit_models(ns, [summaries[i]["median"] for _, _, summaries in points])
+            step = max(ns) * EXTRAPOLATE / CURVE_POINTS
+            for model, fit in fits.items():
+                for k in range(1, CURVE_POINTS + 1):
+                    writer.writerow([name, model, "", round(k * step), predict(fit, model, k * step)])
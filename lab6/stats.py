@@ -0,0 +1,47 @@
+import math
+import statistics
+
+# wartości krytyczne t-Studenta dla 95% (dwustronnie), df = 1..30, powyżej ~ rozkład normalny
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def percentile(values, q):
+    # liniowa interpolacja między najbliższymi pomiarami, q w [0, 100]
+    if not values:
+        return float("nan")
+    data = sorted(values)
+    pos = (len(data) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(data) - 1)
+    return data[low] + (data[high] - data[low]) * (pos - low)
+
+
+def confidence_interval(values):
+    # 95% przedział ufności dla średniej (t-Student), (nan, nan) dla mniej niż 2 pomiarów
+    n = len(values)
+    if n < 2:
+        return float("nan"), float("nan")
+    mean = statistics.fmean(values)
+    t = T_95[n - 2] if n - 1 <= len(T_95) else 1.96
+    half = t * statistics.stdev(values) / math.sqrt(n)
+    return mean - half, mean + half
+
+
+def summarize(values):
+    if not values:
+        return None
+    ci_low, ci_high = confidence_interval(values)
+    return {
+        "n": len(values),
+        "min": min(values),
+        "max": max(values),
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "stddev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+    }
@@ -0,0 +1,65 @@
+from advisor import clean_filter, split_conditions, strip_parens, candidates_for_scan
+
+
+class Scan:
+
+    def __init__(self, relation, filter):
+        self.relation = relation
+        self.filter = filter
+
+
+def conditions(filter):
+    return split_conditions(clean_filter(filter))
+
+
+def ddls(relation, filter, key="key_id"):
+    return [c.ddl("idx") for c in candidates_for_scan(Scan(relation, filter), [], key)]
+
+
+# filtry z plans.txt
+def test_casts_and_outer_parens_are_removed():
+    assert conditions("(purchase_total_price > '15'::double precision)") == ["purchase_total_price > '15'"]
+    assert conditions("(subevent_type = 'concert'::subeventtype)") == ["subevent_type = 'concert'"]
+    assert conditions("((customer_name)::text ~ '^Ab'::text)") == ["(customer_name) ~ '^Ab'"]
+
+
+def test_top_level_and_is_split():
+    assert conditions("((venue_capacity > 100) AND (venue_type = 'stadium'::venuetype))") == [
+        "venue_capacity > 100", "venue_type = 'stadium'"]
+
+
+def test_extract_any_stays_one_condition():
+    assert conditions("((event_status = 'finished'::eventstatus) AND "
+                      "(EXTRACT(month FROM event_start_date) = ANY ('{5,6,7,8,9,10}'::numeric[])))") == [
+        "event_status = 'finished'", "EXTRACT(month FROM event_start_date) = ANY ('{5,6,7,8,9,10}')"]
+
+
+def test_and_inside_or_and_quotes_is_not_split():
+    assert conditions("((ticket_price < '100'::double precision) AND "
+                      "((ticket_type = 'vip'::tickettype) OR (ticket_type = 'standard'::tickettype)))") == [
+        "ticket_price < '100'", "(ticket_type = 'vip') OR (ticket_type = 'standard')"]
+    assert conditions("((v.venue_type)::text = 'rock AND roll'::text)") == ["(venue_type) = 'rock AND roll'"]
+
+
+def test_strip_parens_keeps_unmatched_pairs():
+    assert strip_parens("((a) = 'x')") == "(a) = 'x'"
+    assert strip_parens("(a) = (b)") == "(a) = (b)"
+    assert strip_parens("(a = ')')") == "a = ')'"
+
+
+def test_partial_index_where_is_balanced_and_uses_the_key():
+    assert ddls("subevent", "(subevent_type = 'concert'::subeventtype)") == [
+        "CREATE INDEX idx ON subevent (subevent_type);",
+        "CREATE INDEX idx ON subevent (key_id) WHERE subevent_type = 'concert';"]
+    # bez klucza głównego nie ma indeksu częściowego
+    assert ddls("subevent", "(subevent_type = 'concert'::subeventtype)", key=None) == [
+        "CREATE INDEX idx ON subevent (subevent_type);"]
+
+
+def test_expression_prefix_and_or_candidates():
+    assert "CREATE INDEX idx ON event ((EXTRACT(MONTH FROM event_start_date)));" in ddls(
+        "event", "((event_status = 'finished'::eventstatus) AND "
+                 "(EXTRACT(month FROM event_start_date) = ANY ('{5,6,7,8,9,10}'::numeric[])))")
+    assert ddls("customer", "((customer_name)::text ~ '^Ab'::text)") == [
+        "CREATE INDEX idx ON customer (customer_name text_pattern_ops);"]
+    assert ddls("ticket", "((ticket_type = 'vip'::tickettype) OR (ticket_type = 'standard'::tickettype))") == []
@@ -0,0 +1,106 @@
+import hashlib
+from collections import Counter
+from stats import summarize
+
+VARIANTS_FILE = "warianty.txt"
+OUTPUT_VARIANTS_FILE = "variants_results.txt"
+VARIANT_RUNS = 5
+VARIANT_WARMUP = 1
+
+
+def load_variants(file_path):
+    # grupy równoważnych zapytań:
+    #   -- group: nazwa grupy
+    #   -- variant: nazwa wariantu
+    #   SELECT ...;
+    groups = {}
+    group = variant = None
+    query = ""
+    with open(file_path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith("-- group:"):
+                group = line[len("-- group:"):].strip()
+                groups[group] = []
+                continue
+            if line.startswith("-- variant:"):
+                variant = line[len("-- variant:"):].strip()
+                continue
+            if line.startswith("--"):
+                # zwykły komentarz - doklejony do zapytania zakomentowałby resztę SQL-a
+                continue
+
+            if line:
+                query += line + " "
+
+            if line.endswith(";"):
+                groups[group].append((variant, query.strip()))
+                query = ""
+    return groups
+
+
+def row_hash(row):
+    return hashlib.sha1(repr(tuple(row)).encode()).hexdigest()
+
+
+def result_fingerprint(cursor, procedure_name):
+    # (liczba wierszy, multizbiór hashy wierszy, hash w kolejności zwrócenia)
+    cursor.execute(f"{procedure_name};")
+    hashes = [row_hash(row) for row in cursor.fetchall()]
+    ordered = hashlib.sha1("".join(hashes).encode()).hexdigest()
+    return len(hashes), Counter(hashes), ordered
+
+
+def check_equivalence(cursor, variants):
+    # porównuje wyniki wszystkich wariantów z pierwszym (referencyjnym)
+    report = []
+    ref_name, ref_sql = variants[0]
+    ref_rows, ref_counter, ref_ordered = result_fingerprint(cursor, ref_sql)
+    equivalent = True
+    for name, sql in variants[1:]:
+        rows, counter, ordered = result_fingerprint(cursor, sql)
+        if counter != ref_counter:
+            equivalent = False
+            missing = sum((ref_counter - counter).values())
+            extra = sum((counter - ref_counter).values())
+            report.append(f"    {name}: RÓŻNE WYNIKI ({rows} wierszy vs {ref_rows}, brakuje {missing}, nadmiarowe {extra})")
+        elif ordered != ref_ordered:
+            report.append(f"    {name}: te same wiersze ({rows}), inna kolejność")
+        else:
+            report.append(f"    {name}: identyczny wynik ({rows} wierszy)")
+    return equivalent, report
+
+
+def benchmark_group(cursor, variants, time_query, runs=VARIANT_RUNS, warmup=VARIANT_WARMUP):
+    # warianty uruchamiane na przemian w każdej rundzie, żeby dryf cache/obciążenia rozkładał się równo
+    times = {name: [] for name, _ in variants}
+    for _ in range(warmup):
+        for _, sql in variants:
+            time_query(cursor, sql)
+    for _ in range(runs):
+        for name, sql in variants:
+            times[name].append(time_query(cursor, sql))
+    return {name: summarize(t) for name, t in times.items()}
+
+
+def run_variants(cursor, groups, time_query, runs=VARIANT_RUNS, warmup=VARIANT_WARMUP):
+    report = []
+    for group, variants in groups.items():
+        report.append("=" * 80)
+        report.append(f"Grupa: {group}")
+        equivalent, check = check_equivalence(cursor, variants)
+        report.extend(check)
+        if not equivalent:
+            report.append("    Warianty nie są równoważne - pomijam pomiary.")
+            continue
+
+        results = benchmark_group(cursor, variants, time_query, runs, warmup)
+        ref = results[variants[0][0]]
+        report.append("    {:<20} {:<12} {:<12} {:<12} {:<12} {:<17} {:<10}".format(
+            "Variant", "Median (s)", "Avg (s)", "Stddev (s)", "p95 (s)", "CI95 avg (s)", "Speedup"))
+        for name, _ in variants:
+            r = results[name]
+            ci = f"{r['ci_low']:.3f}-{r['ci_high']:.3f}"
+            report.append(f"    {name:<20} {r['median']:<12.3f} {r['mean']:<12.3f} {r['stddev']:<12.3f} {r['p95']:<12.3f} "
+                          f"{ci:<17} x{ref['median'] / r['median']:.2f}")
+    return report
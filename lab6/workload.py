@@ -0,0 +1,184 @@
+import itertools
+import os
+import random
+import re
+import sys
+from collections import Counter
+from decimal import Decimal
+from prepared import PreparedTransaction, sql_literal
+
+# rozkłady i enumy bierzemy prosto z generatora, żeby parametry losować tak samo jak dane
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "generating_data"))
+from enums import EventStatus, SubeventType
+from distributions import HOLIDAYS, HOLIDAY_SHARE, VENUE_TYPES, VENUE_TYPE_WEIGHTS, VENUE_SIZES, VENUE_SIZE_WEIGHTS
+from distributions import PURCHASE_MULTIPLIERS, PURCHASE_PRICE_STEPS, TICKET_PRICE_STEPS
+
+TEMPLATES_FILE = "szablony.txt"
+POOL_DRAWS = 2000       # ile losowań z rozkładu generatora buduje pulę wartości jednego parametru
+ZIPF_S = 0.0            # 0 = częstości jak w danych, > 0 = gorące klucze (wykładnik Zipfa po rangach)
+
+# {nazwa} albo {nazwa:argument}, np. {name_prefix:2}
+PLACEHOLDER = re.compile(r"\{(\w+)(?::(\w+))?\}")
+
+
+###############################
+# PARAMETRY
+#
+# sampler(rng, faker, arg) -> jedna wartość parametru z tego samego rozkładu co w create_records.py
+
+
+def name_prefix(rng, faker, arg):
+    # '^Ab' - początek imienia klienta (customer_name = faker.first_name())
+    return "^" + faker.first_name()[:int(arg or 2)]
+
+
+def letter_range(first, width):
+    last = chr(min(ord(first.upper()) + width - 1, ord("Z")))
+    return f"^[{first.upper()}-{last}]"
+
+
+def name_range(rng, faker, arg):
+    return letter_range(faker.first_name()[0], int(arg or 15))
+
+
+def city_range(rng, faker, arg):
+    return letter_range(faker.city()[0], int(arg or 6))
+
+
+def purchase_price(rng, faker, arg):
+    return Decimal(str(rng.choice(PURCHASE_MULTIPLIERS) * rng.choice(PURCHASE_PRICE_STEPS)))
+
+
+def ticket_price(rng, faker, arg):
+    return Decimal(str(rng.choice(TICKET_PRICE_STEPS)))
+
+
+def venue_capacity(rng, faker, arg):
+    venue_type = rng.choices(VENUE_TYPES, weights=VENUE_TYPE_WEIGHTS, k=1)[0]
+    low, high = VENUE_SIZES[rng.choices(list(VENUE_SIZES), weights=VENUE_SIZE_WEIGHTS[venue_type], k=1)[0]]
+    # zaokrąglone do setek, żeby w puli były powtórzenia
+    return round(rng.randint(low, high), -2)
+
+
+def venue_type(rng, faker, arg):
+    return rng.choices(VENUE_TYPES, weights=VENUE_TYPE_WEIGHTS, k=1)[0].name.lower()
+
+
+def event_status(rng, faker, arg):
+    return rng.choice(list(EventStatus)).name.lower()
+
+
+def subevent_type(rng, faker, arg):
+    return rng.choice(list(SubeventType)).name.lower()
+
+
+def months(rng, faker, arg):
+    # arg różnych miesięcy z rozkładu dat zakupów/wydarzeń (część przypada na święta)
+    chosen = set()
+    while len(chosen) < int(arg or 6):
+        chosen.add(rng.choice(HOLIDAYS)[0] if rng.random() < HOLIDAY_SHARE else rng.randint(1, 12))
+    return tuple(sorted(chosen))
+
+
+def birth_months(rng, faker, arg):
+    # miesiące urodzenia są w generatorze równomierne
+    return tuple(sorted(rng.sample(range(1, 13), int(arg or 6))))
+
+
+SAMPLERS = {
+    "name_prefix": name_prefix,
+    "name_range": name_range,
+    "city_range": city_range,
+    "purchase_price": purchase_price,
+    "ticket_price": ticket_price,
+    "venue_capacity": venue_capacity,
+    "venue_type": venue_type,
+    "event_status": event_status,
+    "subevent_type": subevent_type,
+    "months": months,
+    "birth_months": birth_months,
+}
+
+
+class ValuePool:
+    # wartości jednego parametru wylosowane raz z rozkładu generatora, od najczęstszej;
+    # zipf_s > 0 zamienia częstości na wagi 1/ranga^s - kilka gorących wartości dostaje większość ruchu
+
+    def __init__(self, sampler, arg, rng, faker, zipf_s=ZIPF_S, draws=POOL_DRAWS):
+        ranked = Counter(sampler(rng, faker, arg) for _ in range(draws)).most_common()
+        self.values = [value for value, _ in ranked]
+        if zipf_s > 0:
+            weights = [1 / rank ** zipf_s for rank in range(1, len(ranked) + 1)]
+        else:
+            weights = [count for _, count in ranked]
+        self.cum_weights = list(itertools.accumulate(weights))
+        self.rng = rng
+
+    def draw(self):
+        return self.rng.choices(self.values, cum_weights=self.cum_weights, k=1)[0]
+
+
+###############################
+# SZABLONY
+
+
+class Template:
+    # transakcja z miejscami na parametry, np. "WHERE t.ticket_price > {ticket_price}"
+
+    def __init__(self, sql, faker, seed=0, zipf_s=ZIPF_S):
+        self.sql = sql
+        self.rng = random.Random(seed)
+        self.pools = []
+        for name, arg in PLACEHOLDER.findall(sql):
+            if name not in SAMPLERS:
+                raise ValueError(f"Nieznany parametr szablonu: {{{name}}}")
+            self.pools.append(ValuePool(SAMPLERS[name], arg, self.rng, faker, zipf_s))
+        numbers = itertools.count(1)
+        self.prepared_sql = PLACEHOLDER.sub(lambda m: f"${next(numbers)}", sql.rstrip().rstrip(";"))
+
+    def sample_params(self):
+        # listy zamiast krotek - pg8000 wysyła je jako tablice
+        return tuple(list(v) if isinstance(v, tuple) else v for v in (pool.draw() for pool in self.pools))
+
+    def render(self):
+        values = iter(self.sample_params())
+        return PLACEHOLDER.sub(lambda m: sql_literal(next(values)), self.sql)
+
+    def __str__(self):
+        return self.sql
+
+
+def new_faker(seed):
+    from faker import Faker
+    faker = Faker()
+    faker.seed_instance(seed)
+    return faker
+
+
+def load_templates(file_path, seed=0, zipf_s=ZIPF_S):
+    # ten sam format co transakcje.txt, wartości {parametrów} losowane przy każdym wykonaniu
+    faker = new_faker(seed)
+    templates = []
+    with open(file_path, 'r') as file:
+        query = ""
+        for line in file:
+            line = line.strip()
+
+            if line:
+                query += line + " "
+
+            if line.endswith(";"):
+                templates.append(Template(query.strip(), faker, seed + len(templates), zipf_s))
+                query = ""
+    return templates
+
+
+def render(procedure):
+    # zapytanie z transakcje.txt zostaje bez zmian, szablon dostaje świeże wartości
+    return procedure.render() if isinstance(procedure, Template) else procedure
+
+
+def to_prepared(procedure):
+    if isinstance(procedure, Template):
+        return PreparedTransaction(procedure.sql, procedure.sample_params, procedure.prepared_sql)
+    return PreparedTransaction(procedure)